@@ -1,147 +1,1282 @@
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, StoppingCriteria, StoppingCriteriaList
 import re
 import stanza
 import io
 import subprocess
 import tempfile
+import gc
 import os
+import shutil
+import threading
+import time
+import unicodedata
+from bisect import bisect_right
+from functools import partial
+from collections import Counter, deque
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from gtts import gTTS
 from pydub import AudioSegment
+from cache import CACHE_ROOT, DiskCache, LRUCache, SQLiteStore, TieredCache, json_decode, json_encode, make_key
 
-# Lazy loading for translation
-_tokenizer = None
-_model = None
+TRANSLATION_MODEL = "facebook/nllb-200-distilled-1.3B"
+SUMMARIZATION_MODEL = "facebook/bart-large-cnn"
 
-def _get_tokenizer():
-    global _tokenizer
-    if _tokenizer is None:
-        _tokenizer = AutoTokenizer.from_pretrained("facebook/nllb-200-distilled-1.3B")
-    return _tokenizer
+# Named model tiers. "quality" is the models above; "fast" uses distilled
+# checkpoints that decode several times faster on CPU at some cost in accuracy.
+MODEL_TIERS = {
+    "fast": {"summarizer": "sshleifer/distilbart-cnn-12-6", "translator": "facebook/nllb-200-distilled-600M"},
+    "quality": {"summarizer": SUMMARIZATION_MODEL, "translator": TRANSLATION_MODEL},
+}
+# Tier for requests that don't name one: "fast", "quality" or "auto", which
+# picks fast for inputs over TIER_AUTO_MAX_WORDS words or when the request
+# would make TIER_AUTO_MAX_INFLIGHT running at once, and quality otherwise.
+MODEL_TIER = os.environ.get("MODEL_TIER", "quality")
+TIER_AUTO_MAX_WORDS = int(os.environ.get("TIER_AUTO_MAX_WORDS", "1500"))
+TIER_AUTO_MAX_INFLIGHT = int(os.environ.get("TIER_AUTO_MAX_INFLIGHT", "2"))
 
-def _get_model():
-    global _model
-    if _model is None:
-        _model = AutoModelForSeq2SeqLM.from_pretrained("facebook/nllb-200-distilled-1.3B")
-    return _model
+# "auto" picks CUDA when available and CPU otherwise; "cuda" or "cpu" pins it.
+SUMMARIZER_DEVICE = os.environ.get("SUMMARIZER_DEVICE", "auto")
+
+# Inputs longer than the summarizer's window are summarised window by window
+# (map) and the partial summaries summarised again (reduce).
+SUMMARIZER_WINDOW_TOKENS = int(os.environ.get("SUMMARIZER_WINDOW_TOKENS", "1024"))
+SUMMARIZER_BATCH_SIZE = int(os.environ.get("SUMMARIZER_BATCH_SIZE", "4"))
+SUMMARIZER_CHUNKED = os.environ.get("SUMMARIZER_CHUNKED", "1") != "0"
+
+# Stop decoding a summary as soon as it has used its word budget (it would be
+# cut to target_words words by _basic_simplify_text anyway).
+SUMMARIZER_EARLY_STOP = os.environ.get("SUMMARIZER_EARLY_STOP", "1") != "0"
+
+# Stream summaries to the UI as they are decoded. Streaming decodes greedily
+# instead of with the model's beam search, so it trades quality for a faster
+# first word and is off by default.
+SUMMARY_STREAMING = os.environ.get("SUMMARY_STREAMING", "0") != "0"
+
+# Default time budget in seconds for simplify_text_with_nlp when the caller
+# passes no deadline; 0 means none. Inputs the summarizer is estimated to miss
+# it on, or that run over it, get an extractive summary instead.
+SIMPLIFY_DEADLINE = float(os.environ.get("SIMPLIFY_DEADLINE", "0"))
+
+# Batched translation: upper bound on padded tokens (rows x longest row) per
+# generate call. Raise it on machines with more cores/memory.
+TRANSLATION_MAX_BATCH_TOKENS = int(os.environ.get("TRANSLATION_MAX_BATCH_TOKENS", "2048"))
+
+# Translation memory: translated sentences keyed by (sentence, languages, model).
+TRANSLATION_MEMORY_SIZE = int(os.environ.get("TRANSLATION_MEMORY_SIZE", "4096"))
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.environ.get("TRANSLATION_MEMORY_MAX_ENTRIES", "200000"))
+
+# After a failed load, wait this long before trying again (doubling each time).
+MODEL_RETRY_BACKOFF = float(os.environ.get("MODEL_RETRY_BACKOFF", "60"))
+MODEL_RETRY_BACKOFF_MAX = float(os.environ.get("MODEL_RETRY_BACKOFF_MAX", "3600"))
+
+# Port of the plain-HTTP readiness endpoint (see start_health_server); 0 disables it.
+HEALTH_PORT = int(os.environ.get("HEALTH_PORT", "8503"))
+# Inference precision for the seq2seq models when they run on CPU:
+# fp32 (default), int8 (dynamic quantization of the linear layers, cached
+# under CACHE_ROOT/quantized) or bf16 (only on CPUs with native bf16 support,
+# otherwise fp32). Ignored on GPU.
+MODEL_PRECISION = os.environ.get("MODEL_PRECISION", "fp32")
+# Execution engine per seq2seq model: "transformers" (default, PyTorch) or
+# "onnx" (exported once with KV-cache and run under ONNX Runtime on CPU;
+# needs `pip install optimum[onnxruntime]`).
+SUMMARIZER_BACKEND = os.environ.get("SUMMARIZER_BACKEND", "transformers")
+TRANSLATOR_BACKEND = os.environ.get("TRANSLATOR_BACKEND", "transformers")
+# Upper bound on the resident size of all loaded models (MB); 0 means unlimited.
+# When a load would exceed it, the least recently used models are evicted.
+MODEL_MEMORY_BUDGET_MB = float(os.environ.get("MODEL_MEMORY_BUDGET_MB", "0"))
+
+# Bump when pipeline logic changes so cached results from older code are ignored.
+PIPELINE_VERSION = 4
+
+# Result cache for simplify_text_with_nlp: in-memory LRU plus an optional disk tier.
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "256"))
+RESULT_CACHE_DISK = os.environ.get("RESULT_CACHE_DISK", "1") != "0"
+RESULT_CACHE_MAX_MB = float(os.environ.get("RESULT_CACHE_MAX_MB", "64"))
+
+# Synthesised audio cache; repeat plays and reruns read the file instead.
+# TTS engine: "gtts" (network), "espeak" or "pyttsx3" (both local/offline).
+# TTS_ENGINE_BY_LANG overrides it per language, e.g. "te=gtts,en=espeak".
+TTS_ENGINE = os.environ.get("TTS_ENGINE", "gtts")
+TTS_ENGINE_BY_LANG = dict(
+    item.split("=", 1) for item in os.environ.get("TTS_ENGINE_BY_LANG", "").split(",") if "=" in item
+)
+TTS_CACHE_MAX_MB = float(os.environ.get("TTS_CACHE_MAX_MB", "256"))
+TTS_CACHE_MEMORY_SIZE = int(os.environ.get("TTS_CACHE_MEMORY_SIZE", "16"))
+
+# Chunked TTS: synthesise sentence-sized segments concurrently and join them in order.
+TTS_CHUNKED = os.environ.get("TTS_CHUNKED", "1") != "0"
+TTS_MAX_WORKERS = int(os.environ.get("TTS_MAX_WORKERS", "4"))
+TTS_SEGMENT_RETRIES = int(os.environ.get("TTS_SEGMENT_RETRIES", "2"))
+TTS_SEGMENT_MAX_CHARS = 300
+TTS_SEGMENT_CACHE_MAX_MB = float(os.environ.get("TTS_SEGMENT_CACHE_MAX_MB", "256"))
+
+# POS tags per sentence, keyed by sentence hash, so repeated sentences skip Stanza.
+POS_CACHE_SIZE = int(os.environ.get("POS_CACHE_SIZE", "4096"))
+
+
+class ModelUnavailableError(RuntimeError):
+    """Raised while a model that failed to load is inside its retry backoff."""
+
+
+class DeadlineExceededError(RuntimeError):
+    """Raised when abstractive summarization runs past the request deadline."""
+
+
+class RequestCancelledError(RuntimeError):
+    """Raised when a request's cancel event is set before it finishes."""
+
+
+class ModelRegistry:
+    """Process-wide owner of every model used by the backend.
+
+    Each model is registered with a loader and an optional warm-up function.
+    Models load on first use, or eagerly through warm_up(), and status()
+    reports where each one is so the UI or a health check can wait for them.
+    A failed load is remembered and not retried until its backoff expires.
+
+    With a memory budget, loading a model evicts the least recently used
+    models until everything fits; an evicted model reloads on its next use.
+    Warm-up never evicts: a model whose known or estimated size would not fit,
+    or that turns out not to fit once loaded, is left "deferred" and loads on
+    first use.
+    """
+
+    def __init__(self, sizer=None, budget_bytes=None):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self._warmup_thread = None
+        self._loaders = {}  # name -> thread started by load_in_background
+        self._loaders_lock = threading.Lock()
+        self._sizer = sizer  # returns the resident bytes of a loaded model
+        self.budget_bytes = budget_bytes or None
+
+    def register(self, name, loader, warmup=None, eager=True, size_hint=None):
+        """Add a model. Only eager models are loaded by warm_up() and
+        counted by is_ready(); the rest load on first use. size_hint is a
+        callable returning the expected resident bytes (or None), used by
+        warm_up() before the first load."""
+        self._entries[name] = {
+            "loader": loader,
+            "warmup": warmup,
+            "eager": eager,
+            "size_hint": size_hint,
+            "lock": threading.Lock(),
+            "value": None,
+            "state": "pending",  # pending | loading | warming | ready | failed | evicted | deferred
+            "error": None,
+            "load_seconds": None,
+            "warmup_seconds": None,
+            "failures": 0,
+            "retry_at": None,
+            "nbytes": None,
+            "last_used": 0.0,
+            "loads": 0,
+            "evictions": 0,
+        }
+
+    def get(self, name, evict=True):
+        """Return the loaded model, loading it first if needed.
+
+        With evict=False (warm-up) no other model is evicted to make room: a
+        model that turns out not to fit is dropped again, left "deferred",
+        and None is returned.
+        """
+        entry = self._entries[name]
+        entry["last_used"] = time.time()
+        value = entry["value"]
+        if value is not None:
+            return value
+        with entry["lock"]:
+            if entry["value"] is None:
+                if entry["retry_at"] is not None and time.time() < entry["retry_at"]:
+                    raise ModelUnavailableError(
+                        f"Model '{name}' failed to load ({entry['error']}); "
+                        f"retrying in {entry['retry_at'] - time.time():.0f}s")
+                # Make room up front when the size is known from an earlier load,
+                # so the old and new weights are never resident together.
+                if evict:
+                    self._evict_for(name, entry["nbytes"] or 0)
+                entry["state"] = "loading"
+                start = time.time()
+                try:
+                    value = entry["loader"]()
+                except Exception as e:
+                    entry["failures"] += 1
+                    backoff = min(MODEL_RETRY_BACKOFF * 2 ** (entry["failures"] - 1), MODEL_RETRY_BACKOFF_MAX)
+                    entry["retry_at"] = time.time() + backoff
+                    entry["state"] = "failed"
+                    entry["error"] = str(e)
+                    raise
+                entry["load_seconds"] = time.time() - start
+                entry["nbytes"] = self._sizer(value) if self._sizer else None
+                entry["loads"] += 1
+                entry["error"] = None
+                entry["failures"] = 0
+                entry["retry_at"] = None
+                entry["last_used"] = time.time()
+                entry["value"] = value
+                entry["state"] = "ready"
+                if evict:
+                    self._evict_for(name, 0)
+                elif self.budget_bytes and self._loaded_bytes() > self.budget_bytes:
+                    entry["value"] = None
+                    entry["state"] = "deferred"
+                    print(f"Model '{name}' ({(entry['nbytes'] or 0) / 2**20:.0f} MB) does not fit in the "
+                          f"{self.budget_bytes / 2**20:.0f} MB model budget; it will load on first use")
+                    del value
+                    _release_memory()
+                    return None
+            return entry["value"]
+
+    def _evict_for(self, name, incoming_bytes):
+        """Evict least recently used models other than `name` until the loaded
+        models plus `incoming_bytes` fit in the budget."""
+        if not self.budget_bytes:
+            return
+        evicted = False
+        with self._evict_lock:
+            while True:
+                resident = [(e["last_used"], n, e) for n, e in self._entries.items()
+                            if e["value"] is not None]
+                total = sum(e["nbytes"] or 0 for _, _, e in resident) + incoming_bytes
+                victims = sorted(item for item in resident if item[1] != name)
+                if total <= self.budget_bytes or not victims:
+                    break
+                _, victim, entry = victims[0]
+                # Callers already holding the model keep it alive until they
+                # finish; the registry only drops its own reference.
+                entry["value"] = None
+                entry["state"] = "evicted"
+                entry["evictions"] += 1
+                evicted = True
+                print(f"Evicted model '{victim}' ({(entry['nbytes'] or 0) / 2**20:.0f} MB) "
+                      f"to fit '{name}' in the {self.budget_bytes / 2**20:.0f} MB model budget")
+        if evicted:
+            _release_memory()
+
+    def load_in_background(self, name):
+        """Start loading `name` on a daemon thread, for callers that can't
+        wait for it now. A no-op while it is loaded or already loading."""
+        if self._entries[name]["value"] is not None:
+            return
+        with self._loaders_lock:
+            thread = self._loaders.get(name)
+            if thread is not None and thread.is_alive():
+                return
+
+            def run():
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"Background load of model '{name}' failed: {e}")
+
+            thread = threading.Thread(target=run, name=f"load-{name}", daemon=True)
+            self._loaders[name] = thread
+            thread.start()
+
+    def _load_and_warm(self, name):
+        entry = self._entries[name]
+        try:
+            model = self.get(name, evict=False)
+        except Exception as e:
+            print(f"Model '{name}' failed to load: {e}")
+            return
+        if model is None:
+            return
+        if entry["warmup"] is None or entry["warmup_seconds"] is not None:
+            return
+        entry["state"] = "warming"
+        start = time.time()
+        try:
+            entry["warmup"](model)
+        except Exception as e:
+            # A failed dummy inference does not make the model unusable.
+            print(f"Model '{name}' warm-up failed: {e}")
+        entry["warmup_seconds"] = time.time() - start
+        entry["state"] = "ready"
+
+    def warm_up(self, background=True):
+        """Load every registered model and run a dummy inference on each.
+
+        With background=True this returns immediately and the work happens
+        on a daemon thread; calling it again while that thread is alive is a no-op.
+        """
+        with self._lock:
+            if self._warmup_thread is not None and self._warmup_thread.is_alive():
+                return self._warmup_thread
+
+            def run():
+                # Registration order is warm-up order, so the models requests
+                # need most are loaded while there is room.
+                # Warm-up never evicts: a model that would not fit is deferred.
+                for name in [n for n, e in self._entries.items() if e["eager"]]:
+                    if self.budget_bytes and not self._fits(name):
+                        self._defer(name)
+                        continue
+                    self._load_and_warm(name)
+
+            if not background:
+                run()
+                return None
+            self._warmup_thread = threading.Thread(target=run, name="model-warmup", daemon=True)
+            self._warmup_thread.start()
+            return self._warmup_thread
+
+    def _fits(self, name):
+        """Whether `name` can load without evicting anything. A model of
+        unknown size fits as long as the budget is not already used up."""
+        entry = self._entries[name]
+        if entry["value"] is not None:
+            return True
+        size = entry["nbytes"]
+        if size is None and entry["size_hint"] is not None:
+            try:
+                size = entry["size_hint"]()
+            except Exception as e:
+                print(f"Could not estimate the size of model '{name}': {e}")
+        loaded = self._loaded_bytes()
+        if size is None:
+            return loaded < self.budget_bytes
+        return loaded + size <= self.budget_bytes
+
+    def _defer(self, name):
+        entry = self._entries[name]
+        if entry["value"] is None and entry["state"] in ("pending", "evicted"):
+            entry["state"] = "deferred"
+            print(f"Model '{name}' does not fit in the model budget; it will load on first use")
+
+    def status(self):
+        """Return a JSON-serialisable readiness report for every model."""
+        models = {}
+        now = time.time()
+        for name, entry in self._entries.items():
+            retry_at = entry["retry_at"]
+            models[name] = {
+                "state": entry["state"],
+                "error": entry["error"],
+                "retry_in": max(0.0, retry_at - now) if retry_at is not None else None,
+                "load_seconds": entry["load_seconds"],
+                "warmup_seconds": entry["warmup_seconds"],
+                "bytes": entry["nbytes"] if entry["value"] is not None else None,
+                "evictions": entry["evictions"],
+                "reloads": max(0, entry["loads"] - 1),
+            }
+        eager = [name for name in models if self._entries[name]["eager"]]
+        # A failed model is not ready; it is listed so callers can tell
+        # "still loading" from "broken".
+        failed = [name for name in eager if models[name]["state"] == "failed"]
+        ready = all(models[name]["state"] in ("ready", "evicted", "deferred") for name in eager)
+        return {
+            "ready": ready,
+            "failed": failed,
+            "models": models,
+            "memory": {
+                "budget_bytes": self.budget_bytes,
+                "loaded_bytes": sum(m["bytes"] or 0 for m in models.values()),
+                "evictions": sum(m["evictions"] for m in models.values()),
+                "reloads": sum(m["reloads"] for m in models.values()),
+            },
+        }
+
+    def is_ready(self):
+        return self.status()["ready"]
+
+    def set_eager(self, name, eager=True):
+        """Change whether warm_up() loads a model (and is_ready() waits for it)."""
+        self._entries[name]["eager"] = eager
+
+    def _loaded_bytes(self):
+        return sum(e["nbytes"] or 0 for e in self._entries.values() if e["value"] is not None)
+
+    def loaded(self):
+        """{name: model} for every model currently in memory."""
+        return {name: entry["value"] for name, entry in self._entries.items() if entry["value"] is not None}
+
+
+def _model_parts(obj, depth=0):
+    """Yield the torch modules and ONNX Runtime models inside a loaded model:
+    a bare model, a transformers pipeline (.model), a Stanza pipeline
+    (.processors) or a dict."""
+    import torch
+    if isinstance(obj, torch.nn.Module) or hasattr(obj, "model_save_dir"):
+        yield obj
+        return
+    if obj is None or depth > 3:
+        return
+    if isinstance(obj, dict):
+        children = obj.values()
+    else:
+        children = [getattr(obj, name, None) for name in ("model", "_model", "processors")]
+    for child in children:
+        yield from _model_parts(child, depth + 1)
+
+def _model_nbytes(obj):
+    """Bytes held by the parameters and buffers of a loaded model. Tensors
+    that share storage (e.g. tied embeddings) are counted once."""
+    seen = set()
+    total = 0
+    for module in _model_parts(obj):
+        if hasattr(module, "model_save_dir"):
+            total += _onnx_nbytes(module.model_save_dir)
+            continue
+        tensors = list(module.parameters()) + list(module.buffers())
+        # Dynamically quantized Linear layers keep their packed weights
+        # outside parameters(); weight() unpacks them.
+        tensors += [m.weight() for m in module.modules() if callable(getattr(m, "weight", None))]
+        for tensor in tensors:
+            ptr = tensor.data_ptr()
+            if ptr in seen:
+                continue
+            seen.add(ptr)
+            total += tensor.numel() * tensor.element_size()
+    return total
+
+def _onnx_nbytes(directory):
+    # ONNX Runtime maps the exported weights in full, so their size on disk
+    # is a good estimate of what they occupy in memory.
+    total = 0
+    for root, _, files in os.walk(str(directory)):
+        for name in files:
+            if name.endswith((".onnx", ".onnx_data")):
+                total += os.path.getsize(os.path.join(root, name))
+    return total
+
+def _process_rss():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _release_memory():
+    """Return freed model memory to the allocator after an eviction."""
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except ImportError:
+        pass
+
+
+registry = ModelRegistry(sizer=_model_nbytes, budget_bytes=int(MODEL_MEMORY_BUDGET_MB * 1024 * 1024))
+
+
+def _load_stanza():
+    return stanza.Pipeline(lang='te', processors='tokenize,pos')  # Telugu POS tagger
+
+def _warm_stanza(pipeline):
+    pipeline("ఇది ఒక వాక్యం.")
+
+def _resolve_device(preference=None):
+    """Map a device preference ("auto", "cuda", "cpu") to a concrete device."""
+    preference = preference or SUMMARIZER_DEVICE
+    if preference != "auto":
+        return preference
+    try:
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    except ImportError:
+        return "cpu"
+
+def _cpu_supports_bf16():
+    """True when the CPU has native bf16 arithmetic (AVX512-BF16 or AMX);
+    elsewhere bf16 is emulated and slower than fp32."""
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+def _effective_precision(device="cpu"):
+    if device != "cpu" or MODEL_PRECISION == "fp32":
+        return "fp32"
+    if MODEL_PRECISION == "bf16" and not _cpu_supports_bf16():
+        print("MODEL_PRECISION=bf16 but this CPU has no native bf16 support; using fp32")
+        return "fp32"
+    if MODEL_PRECISION not in ("int8", "bf16"):
+        print(f"Unknown MODEL_PRECISION '{MODEL_PRECISION}'; using fp32")
+        return "fp32"
+    return MODEL_PRECISION
+
+def _quantized_path(model_name):
+    import torch
+    import transformers
+    key = make_key(model_name, "int8", torch.__version__, transformers.__version__)
+    return os.path.join(CACHE_ROOT, "quantized", f"{model_name.replace('/', '--')}-{key[:16]}.pt")
+
+def _load_onnx_seq2seq(model_name):
+    """Load `model_name` as an ONNX Runtime model (encoder, decoder and
+    decoder-with-past, so generation reuses the KV cache).
+
+    The first call exports the checkpoint under CACHE_ROOT/onnx; later calls
+    load the exported graphs directly.
+    """
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError:
+        raise RuntimeError("The onnx backend needs optimum with onnxruntime: pip install optimum[onnxruntime]")
+    import optimum
+    key = make_key(model_name, optimum.__version__)
+    path = os.path.join(CACHE_ROOT, "onnx", f"{model_name.replace('/', '--')}-{key[:16]}")
+    if os.path.exists(os.path.join(path, "config.json")):
+        return ORTModelForSeq2SeqLM.from_pretrained(path, use_cache=True, provider="CPUExecutionProvider")
+
+    if MODEL_PRECISION != "fp32":
+        print(f"MODEL_PRECISION={MODEL_PRECISION} is ignored by the onnx backend")
+    start = time.time()
+    model = ORTModelForSeq2SeqLM.from_pretrained(
+        model_name, export=True, use_cache=True, provider="CPUExecutionProvider")
+    print(f"Exported {model_name} to ONNX in {time.time() - start:.1f}s")
+    tmp_path = path + ".tmp"
+    try:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        model.save_pretrained(tmp_path)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Warning: failed to cache ONNX export of {model_name}: {e}")
+    return model
+
+def _load_seq2seq(model_name, device="cpu", backend="transformers"):
+    """Load a seq2seq model at the configured precision for `device`, or as
+    an ONNX Runtime model when `backend` is "onnx".
+
+    int8 models are quantized once and saved whole, so later starts read the
+    quantized model directly instead of loading fp32 weights and quantizing.
+    """
+    if backend == "onnx":
+        return _load_onnx_seq2seq(model_name)
+    if backend != "transformers":
+        print(f"Unknown model backend '{backend}'; using transformers")
+    import torch
+    precision = _effective_precision(device)
+    if precision == "bf16":
+        return AutoModelForSeq2SeqLM.from_pretrained(model_name, torch_dtype=torch.bfloat16).eval()
+    if precision != "int8":
+        return AutoModelForSeq2SeqLM.from_pretrained(model_name)
+
+    path = _quantized_path(model_name)
+    if os.path.exists(path):
+        try:
+            return torch.load(path, weights_only=False).eval()
+        except Exception as e:
+            print(f"Failed to read quantized {model_name} from {path} ({e}); re-quantizing")
+    start = time.time()
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name).eval()
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    print(f"Quantized {model_name} to int8 in {time.time() - start:.1f}s")
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        torch.save(model, tmp_path)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Warning: failed to cache quantized {model_name}: {e}")
+    return model
+
+def _estimate_model_bytes(model_name):
+    """Expected resident bytes of a seq2seq checkpoint, from the size of its
+    weights in the local Hugging Face cache, or None before it is downloaded."""
+    from huggingface_hub import try_to_load_from_cache
+    for filename in ("model.safetensors", "pytorch_model.bin"):
+        path = try_to_load_from_cache(model_name, filename)
+        if isinstance(path, str) and os.path.exists(path):
+            nbytes = os.path.getsize(path)  # fp32 weights
+            precision = _effective_precision(_resolve_device())
+            # Dynamic int8 only quantizes the Linear layers; embeddings stay fp32.
+            return int(nbytes * {"fp32": 1.0, "bf16": 0.5, "int8": 0.4}[precision])
+    return None
+
+def _load_summarizer(model_name=SUMMARIZATION_MODEL):
+    from transformers import pipeline
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if SUMMARIZER_BACKEND == "onnx":
+        return pipeline("summarization", model=_load_seq2seq(model_name, backend="onnx"),
+                        tokenizer=tokenizer)
+    device = _resolve_device()
+    try:
+        return pipeline("summarization", model=_load_seq2seq(model_name, device),
+                        tokenizer=tokenizer, device=device)
+    except Exception as e:
+        if device == "cpu":
+            raise
+        print(f"Summarizer failed to load on {device} ({e}); loading on CPU")
+        return pipeline("summarization", model=_load_seq2seq(model_name, "cpu"),
+                        tokenizer=tokenizer, device="cpu")
+
+def _warm_summarizer(summarizer):
+    summarizer("The model is loaded. This sentence primes it before real requests arrive.",
+               min_length=5, max_length=20, do_sample=False)
+
+def _load_nllb(model_name=TRANSLATION_MODEL):
+    return {
+        "tokenizer": AutoTokenizer.from_pretrained(model_name),
+        "model": _load_seq2seq(model_name, "cpu", TRANSLATOR_BACKEND),
+    }
+
+def _warm_nllb(nllb):
+    tokenizer, model = nllb["tokenizer"], nllb["model"]
+    inputs = tokenizer("Hello.", return_tensors="pt")
+    model.generate(**inputs, forced_bos_token_id=tokenizer.convert_tokens_to_ids('tel_Telu'), max_new_tokens=8)
+
+def _model_key(kind, tier="quality"):
+    """Registry name of a tier's "summarizer" or "nllb"; the quality tier
+    keeps the plain names."""
+    return kind if tier == "quality" else f"{kind}-{tier}"
+
+# Registration order is warm-up order: Stanza (small, and the Telugu path
+# needs it), then the summarizers every simplification calls, then the
+# translators. Within a kind the tiers MODEL_TIER serves come first, quality
+# before fast, so under a memory budget the rest is what gets deferred.
+# Warm-up only loads the tiers the default MODEL_TIER can serve.
+def _register_models():
+    registry.register("stanza", _load_stanza, _warm_stanza)
+    tiers = sorted(MODEL_TIERS, key=lambda tier: (MODEL_TIER not in (tier, "auto"), tier != "quality"))
+    for tier in tiers:
+        model_name = MODEL_TIERS[tier]["summarizer"]
+        registry.register(_model_key("summarizer", tier), partial(_load_summarizer, model_name),
+                          _warm_summarizer, eager=MODEL_TIER in (tier, "auto"),
+                          size_hint=partial(_estimate_model_bytes, model_name))
+    for tier in tiers:
+        model_name = MODEL_TIERS[tier]["translator"]
+        registry.register(_model_key("nllb", tier), partial(_load_nllb, model_name),
+                          _warm_nllb, eager=MODEL_TIER in (tier, "auto"),
+                          size_hint=partial(_estimate_model_bytes, model_name))
+
+_register_models()
+
+
+def start_model_warmup(background=True, tiers=None, kinds=None):
+    """Eagerly load and prime all models; call once at server start.
+
+    tiers names extra tiers to warm besides those MODEL_TIER serves, e.g.
+    every tier a UI lets users pick, so none of them loads mid-request.
+    kinds limits warm-up to some of "stanza", "summarizer" and "nllb", e.g.
+    the ones a UI actually calls; the others load on first use.
+    """
+    for tier in tiers or ():
+        registry.set_eager(_model_key("summarizer", tier))
+        registry.set_eager(_model_key("nllb", tier))
+    if kinds is not None:
+        if "stanza" not in kinds:
+            registry.set_eager("stanza", False)
+        for kind in ("summarizer", "nllb"):
+            if kind not in kinds:
+                for tier in MODEL_TIERS:
+                    registry.set_eager(_model_key(kind, tier), False)
+    return registry.warm_up(background=background)
+
+def get_model_status():
+    return registry.status()
+
+def start_health_server(port=None):
+    """Serve get_model_status() as JSON over plain HTTP on a daemon thread,
+    for load balancers and other clients that can't run the Streamlit page.
+    Responds 200 once every eager model is loaded and 503 before that or
+    after a load failed. Returns the server, or None if it could not start."""
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    port = HEALTH_PORT if port is None else port
+    if not port:
+        return None
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status = get_model_status()
+            body = json.dumps(status).encode("utf-8")
+            self.send_response(200 if status["ready"] else 503)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # health checks poll often; keep them out of the app log
+
+    try:
+        server = ThreadingHTTPServer(("", port), Handler)
+    except OSError as e:
+        print(f"Health endpoint not started on port {port}: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, name="health-server", daemon=True).start()
+    return server
+
+def model_memory_report():
+    """Resident bytes of every loaded model and of the whole process, for
+    working out how many workers fit on a node."""
+    models = {name: _model_nbytes(model) for name, model in registry.loaded().items()}
+    memory = registry.status()["memory"]
+    return {
+        "models": models,
+        "total_model_bytes": sum(models.values()),
+        "process_rss_bytes": _process_rss(),
+        "budget_bytes": memory["budget_bytes"],
+        "evictions": memory["evictions"],
+        "reloads": memory["reloads"],
+    }
+
+_result_cache = TieredCache(
+    LRUCache(RESULT_CACHE_SIZE),
+    DiskCache(os.path.join(CACHE_ROOT, "results"), int(RESULT_CACHE_MAX_MB * 1024 * 1024), ".json")
+    if RESULT_CACHE_DISK else None,
+    encode=json_encode,
+    decode=json_decode,
+)
+
+_tts_cache = TieredCache(
+    LRUCache(TTS_CACHE_MEMORY_SIZE),
+    DiskCache(os.path.join(CACHE_ROOT, "tts"), int(TTS_CACHE_MAX_MB * 1024 * 1024), ".mp3"),
+)
+
+# Per-sentence audio, so a re-simplified summary only synthesises changed sentences.
+_tts_segment_cache = TieredCache(
+    LRUCache(256),
+    DiskCache(os.path.join(CACHE_ROOT, "tts_segments"), int(TTS_SEGMENT_CACHE_MAX_MB * 1024 * 1024), ".mp3"),
+)
+
+_pos_cache = TieredCache(LRUCache(POS_CACHE_SIZE))
+
+_translation_memory = TieredCache(
+    LRUCache(TRANSLATION_MEMORY_SIZE),
+    SQLiteStore(os.path.join(CACHE_ROOT, "translation_memory.sqlite3"), TRANSLATION_MEMORY_MAX_ENTRIES),
+    encode=lambda text: text.encode("utf-8"),
+    decode=lambda data: data.decode("utf-8"),
+)
+
+def get_cache_stats():
+    """Hit/miss counters for the backend caches."""
+    return {
+        "results": _result_cache.stats(),
+        "pos": _pos_cache.stats(),
+        "translation": _translation_memory.stats(),
+        "tts": _tts_cache.stats(),
+        "tts_segments": _tts_segment_cache.stats(),
+    }
+
+def _model_versions(tier="quality"):
+    return {"pipeline": PIPELINE_VERSION, "summarizer": MODEL_TIERS[tier]["summarizer"],
+            "translator": MODEL_TIERS[tier]["translator"], "precision": MODEL_PRECISION,
+            "summarizer_backend": SUMMARIZER_BACKEND, "translator_backend": TRANSLATOR_BACKEND,
+            "chunked": SUMMARIZER_CHUNKED, "early_stop": SUMMARIZER_EARLY_STOP}
+
+def _result_cache_key(text, target_language, simplify_vocab, split_sentences, target_words, tier="quality",
+                      streamed=False):
+    normalized = unicodedata.normalize("NFC", " ".join(text.split()))
+    parts = [normalized, target_language, bool(simplify_vocab), bool(split_sentences),
+             int(target_words), _model_versions(tier)]
+    if streamed:
+        parts.append("greedy")  # streamed summaries are decoded greedily, not with beam search
+    return make_key(*parts)
+
+# Requests currently running the models; "auto" falls back to the fast tier
+# when a new request would bring this to TIER_AUTO_MAX_INFLIGHT.
+_inflight = 0
+_inflight_lock = threading.Lock()
+
+def choose_tier(text, tier=None):
+    """Resolve a requested tier ("fast", "quality", "auto" or None for
+    MODEL_TIER) to the tier that will serve `text`."""
+    tier = tier or MODEL_TIER
+    if tier in MODEL_TIERS:
+        return tier
+    if tier != "auto":
+        print(f"Unknown model tier '{tier}'; using quality")
+        return "quality"
+    # The request being routed is not counted in _inflight yet, so add it.
+    if len(text.split()) > TIER_AUTO_MAX_WORDS or _inflight + 1 >= TIER_AUTO_MAX_INFLIGHT:
+        return "fast"
+    return "quality"
+
+def _get_tokenizer(tier="quality"):
+    return registry.get(_model_key("nllb", tier))["tokenizer"]
+
+def _get_model(tier="quality"):
+    return registry.get(_model_key("nllb", tier))["model"]
+
+def _get_summarizer(tier="quality"):
+    return registry.get(_model_key("summarizer", tier))
+
+def _get_nlp():
+    """Telugu POS tagger, or None if Stanza could not be loaded."""
+    try:
+        return registry.get("stanza")
+    except Exception:
+        return None
 
 class summarizer_TTS:
+    """Translation helper bound to one text.
+
+    Uses the process-wide NLLB instance from the registry rather than loading
+    its own copy of the weights, so any number of instances cost no extra memory.
+    """
+
     def __init__(self, text, target_language='Telugu'):
-        self.tokenizer = AutoTokenizer.from_pretrained("facebook/nllb-200-distilled-1.3B")
-        self.model = AutoModelForSeq2SeqLM.from_pretrained("facebook/nllb-200-distilled-1.3B")
         self.text = text
         self.target_language = target_language
 
+    @property
+    def tokenizer(self):
+        return _get_tokenizer()
+
+    @property
+    def model(self):
+        return _get_model()
+
     def convert_indic_lang_to_english(self, indic_text, target_language_code='eng_Latn'):
-        inputs = self.tokenizer(indic_text, return_tensors="pt")
-        translated_tokens = self.model.generate(
-            **inputs,
-            forced_bos_token_id=self.tokenizer.convert_tokens_to_ids(target_language_code))
-        translated_text = self.tokenizer.batch_decode(translated_tokens, skip_special_tokens=True)[0]
-        return translated_text
+        return convert_indic_lang_to_english(indic_text, target_language_code)
 
     def convert_english_to_indic_lang(self, english_text, target_language_code='tel_Telu'):
-        inputs = self.tokenizer(english_text, return_tensors="pt")
-        translated_tokens = self.model.generate(
-            **inputs,
-            forced_bos_token_id=self.tokenizer.convert_tokens_to_ids(target_language_code))
-        translated_text = self.tokenizer.batch_decode(translated_tokens, skip_special_tokens=True)[0]
-        return translated_text
-
-def convert_indic_lang_to_english(indic_text, target_language_code='eng_Latn'):
-    tokenizer = _get_tokenizer()
-    model = _get_model()
-    inputs = tokenizer(indic_text, return_tensors="pt")
-    translated_tokens = model.generate(
-        **inputs,
-        forced_bos_token_id=tokenizer.convert_tokens_to_ids(target_language_code))
-    translated_text = tokenizer.batch_decode(translated_tokens, skip_special_tokens=True)[0]
-    return translated_text
-
-def convert_english_to_indic_lang(english_text, target_language_code='tel_Telu'):
-    tokenizer = _get_tokenizer()
-    model = _get_model()
-    inputs = tokenizer(english_text, return_tensors="pt")
-    translated_tokens = model.generate(
-        **inputs,
-        forced_bos_token_id=tokenizer.convert_tokens_to_ids(target_language_code))
-    translated_text = tokenizer.batch_decode(translated_tokens, skip_special_tokens=True)[0]
-    return translated_text
-
-# If using a POS pipeline, set nlp to your Telugu tagger; else set nlp=None
-nlp = stanza.Pipeline(lang='te', processors='tokenize,pos')  # Telugu POS tagger
+        return convert_english_to_indic_lang(english_text, target_language_code)
+
+# The NLLB tokenizer is shared; src_lang must not change between set and encode.
+_tokenizer_lock = threading.Lock()
+
+def _length_buckets(order, lengths, max_batch_tokens):
+    """Group indices (already sorted by length) into batches whose padded size,
+    rows x longest row, stays within max_batch_tokens."""
+    batches, current = [], []
+    for i in order:
+        # Sorted ascending, so the new item is the longest in the batch
+        if current and (len(current) + 1) * lengths[i] > max_batch_tokens:
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+def _split_translation_sentences(text):
+    return [s for s in re.split(r'(?<=[.!?।])\s+', text.strip()) if s]
+
+def _translation_key(sentence, source_language_code, target_language_code, tier):
+    normalized = unicodedata.normalize("NFC", " ".join(sentence.split()))
+    return make_key(normalized, source_language_code, target_language_code,
+                    MODEL_TIERS[tier]["translator"], MODEL_PRECISION, TRANSLATOR_BACKEND)
+
+def translate_batch(texts, source_language_code, target_language_code, max_batch_tokens=None, tier=None,
+                    cancel=None):
+    """Translate a list of strings with NLLB, returned in the original order.
+
+    Every text is split into sentences and each sentence is looked up in the
+    translation memory; only misses (deduplicated across all texts) are sent
+    to the model of the chosen tier (see choose_tier).
+
+    cancel is an optional threading.Event; once it is set, translation stops
+    between batches or decoding steps with RequestCancelledError.
+    """
+    if not texts:
+        return []
+    _check_cancelled(cancel)
+    tier = choose_tier(" ".join(texts), tier)
+    split = [_split_translation_sentences(text) for text in texts]
+    keys = {}
+    for sentences in split:
+        for sentence in sentences:
+            keys[sentence] = _translation_key(sentence, source_language_code, target_language_code, tier)
+
+    translated = {}
+    misses = []
+    for sentence, key in keys.items():
+        cached = _translation_memory.get(key)
+        if cached is not None:
+            translated[sentence] = cached
+        else:
+            misses.append(sentence)
+    if misses:
+        outputs = _translate_uncached(misses, source_language_code, target_language_code, max_batch_tokens, tier,
+                                      cancel)
+        # One disk transaction for the whole batch of new translations
+        _translation_memory.put_many((keys[sentence], output) for sentence, output in zip(misses, outputs))
+        translated.update(zip(misses, outputs))
+
+    return [" ".join(translated[sentence] for sentence in sentences) for sentences in split]
+
+def _translate_uncached(texts, source_language_code, target_language_code, max_batch_tokens=None,
+                        tier="quality", cancel=None):
+    """Run the tier's NLLB over texts.
+
+    Inputs are sorted by token length and padded only within buckets of
+    similar length, each bucket is one batched generate call, and the
+    translations are returned in the original order.
+    """
+    tokenizer = _get_tokenizer(tier)
+    model = _get_model(tier)
+    with _tokenizer_lock:
+        tokenizer.src_lang = source_language_code
+        encoded = tokenizer(list(texts))["input_ids"]
+    lengths = [len(ids) for ids in encoded]
+    order = sorted(range(len(texts)), key=lambda i: lengths[i])
+    forced_bos_token_id = tokenizer.convert_tokens_to_ids(target_language_code)
+
+    results = [None] * len(texts)
+    for batch in _length_buckets(order, lengths, max_batch_tokens or TRANSLATION_MAX_BATCH_TOKENS):
+        _check_cancelled(cancel)
+        inputs = tokenizer.pad({"input_ids": [encoded[i] for i in batch]}, return_tensors="pt")
+        translated_tokens = model.generate(**inputs, forced_bos_token_id=forced_bos_token_id,
+                                           **_stopping_criteria(tokenizer, cancel=cancel))
+        # A cancelled batch stops mid-sentence; don't hand that back
+        _check_cancelled(cancel)
+        for i, translated_text in zip(batch, tokenizer.batch_decode(translated_tokens, skip_special_tokens=True)):
+            results[i] = translated_text
+    return results
+
+def stream_translation(text, source_language_code, target_language_code, tier=None, cancel=None):
+    """Translate text sentence by sentence, yielding the whole translation so
+    far each time it grows: at once for sentences in the translation memory,
+    token by token for the rest. Setting cancel stops it as in translate_batch."""
+    tier = choose_tier(text, tier)
+    done = []
+    for sentence in _split_translation_sentences(text):
+        _check_cancelled(cancel)
+        key = _translation_key(sentence, source_language_code, target_language_code, tier)
+        translated = _translation_memory.get(key)
+        if translated is None:
+            tokenizer = _get_tokenizer(tier)
+            with _tokenizer_lock:
+                tokenizer.src_lang = source_language_code
+                inputs = tokenizer(sentence, return_tensors="pt")
+            partial = ""
+            for partial in _stream_generate(_get_model(tier), tokenizer, inputs,
+                                            forced_bos_token_id=tokenizer.convert_tokens_to_ids(target_language_code),
+                                            **_stopping_criteria(tokenizer, cancel=cancel)):
+                yield " ".join(done + [partial])
+            _check_cancelled(cancel)
+            translated = partial.strip()
+            _translation_memory.put(key, translated)
+        done.append(translated)
+        yield " ".join(done)
+
+def convert_indic_lang_to_english(indic_text, target_language_code='eng_Latn', source_language_code='tel_Telu',
+                                  tier=None, cancel=None):
+    return translate_batch([indic_text], source_language_code, target_language_code, tier=tier, cancel=cancel)[0]
+
+def convert_english_to_indic_lang(english_text, target_language_code='tel_Telu', source_language_code='eng_Latn',
+                                  tier=None, cancel=None):
+    return translate_batch([english_text], source_language_code, target_language_code, tier=tier, cancel=cancel)[0]
+
+def convert_indic_lang_to_english_batch(indic_texts, target_language_code='eng_Latn',
+                                        source_language_code='tel_Telu', max_batch_tokens=None, tier=None,
+                                        cancel=None):
+    return translate_batch(indic_texts, source_language_code, target_language_code, max_batch_tokens, tier, cancel)
+
+def convert_english_to_indic_lang_batch(english_texts, target_language_code='tel_Telu',
+                                        source_language_code='eng_Latn', max_batch_tokens=None, tier=None,
+                                        cancel=None):
+    return translate_batch(english_texts, source_language_code, target_language_code, max_batch_tokens, tier, cancel)
 
 TOOL_HINTS = ["పనిముట్టు", "సాధనం", "యాప్", "సాఫ్ట్‌వేర్"]
 TELUGU = r"[\u0C00-\u0C7F]+"
+NOUN_TAGS = {"NOUN", "PROPN"}
 
-def highlight_nouns_with_fallback(text):
+def _split_sentence_spans(text, is_telugu=True):
+    """(start, end) of every non-empty, whitespace-trimmed sentence.
+    Splits on the same endings as _create_noun_preserving_summary."""
+    pattern = r'[^।\.\!\?]+' if is_telugu else r'[^.!?]+'
     spans = []
+    for m in re.finditer(pattern, text):
+        start, end = m.span()
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            spans.append((start, end))
+    return spans
 
-    # POS-driven spans
-    if nlp is not None:
-        doc = nlp(text)
-        for s in doc.sentences:
-            for w in s.words:
-                if w.upos in {"NOUN", "PROPN"} and w.start_char is not None and w.end_char is not None:
-                    pre = text[w.start_char-1] if w.start_char > 0 else ""
-                    post = text[w.end_char] if w.end_char < len(text) else ""
-                    if pre in "'‘’" or post in "'‘’":
-                        continue
-                    spans.append((w.start_char, w.end_char))
+def analyze_pos(text):
+    """Tag text with the Telugu POS tagger once per document.
+
+    Returns one entry per sentence from _split_sentence_spans:
+    {"start", "end", "words": [(word, start, end, upos), ...]} with offsets
+    into text, or None when no tagger is available. Sentences seen before
+    come from the POS cache; the rest go to Stanza in a single call.
+    """
+    nlp = _get_nlp()
+    if nlp is None:
+        return None
+    sentences = _split_sentence_spans(text)
+    keys = [make_key(text[start:end]) for start, end in sentences]
+    tagged = [_pos_cache.get(key) for key in keys]
+    missing = [i for i, words in enumerate(tagged) if words is None]
+
+    if missing:
+        # Blank lines keep Stanza from merging neighbouring sentences.
+        offsets, pieces, pos = [], [], 0
+        for i in missing:
+            start, end = sentences[i]
+            offsets.append(pos)
+            pieces.append(text[start:end])
+            pos += end - start + 2
+        doc = nlp("\n\n".join(pieces))
+        words_by_piece = [[] for _ in missing]
+        for sentence in doc.sentences:
+            for w in sentence.words:
+                if w.start_char is None or w.end_char is None:
+                    continue
+                j = bisect_right(offsets, w.start_char) - 1
+                words_by_piece[j].append((w.text, w.start_char - offsets[j], w.end_char - offsets[j], w.upos))
+        for j, i in enumerate(missing):
+            _pos_cache.put(keys[i], words_by_piece[j])
+            tagged[i] = words_by_piece[j]
+
+    return [
+        {"start": start, "end": end,
+         "words": [(word, start + ws, start + we, upos) for word, ws, we, upos in words]}
+        for (start, end), words in zip(sentences, tagged)
+    ]
+
+def _is_word_char(ch):
+    # Telugu vowel signs and viramas are marks, not alphanumerics, but they
+    # are part of the word they follow.
+    return ch.isalnum() or ch == "_" or unicodedata.category(ch).startswith("M")
+
+def _find_token(text, word, start=0):
+    """Index of the first occurrence of word in text at or after start that
+    is not part of a longer word, or -1."""
+    if not word:
+        return -1
+    i = text.find(word, start)
+    while i >= 0:
+        end = i + len(word)
+        if (i == 0 or not _is_word_char(text[i - 1])) and (end == len(text) or not _is_word_char(text[end])):
+            return i
+        i = text.find(word, i + 1)
+    return -1
+
+def highlight_nouns_with_fallback(text, nouns=None):
+    """Find noun spans in text.
+
+    Returns {"text": text, "spans": [(start, end, tag), ...]} with merged,
+    non-overlapping spans, so callers can render highlighting without more NLP.
+
+    nouns is an optional list of (word, upos) pairs tagged upstream, in the
+    order they appear in text; when given they are located in text directly
+    instead of running the tagger again.
+    """
+    spans = []
+    candidates = []
+
+    if nouns is not None:
+        # Project upstream annotations onto the text. Only whole-token matches
+        # count, so a short noun can't land inside an earlier, longer word
+        # and push the cursor past its real occurrence.
+        cursor = 0
+        for word, upos in nouns:
+            start = _find_token(text, word, cursor)
+            if start < 0:
+                continue
+            cursor = start + len(word)
+            candidates.append((start, cursor, upos))
+    else:
+        # POS-driven spans
+        nlp = _get_nlp()
+        if nlp is not None:
+            doc = nlp(text)
+            for s in doc.sentences:
+                for w in s.words:
+                    if w.upos in NOUN_TAGS and w.start_char is not None and w.end_char is not None:
+                        candidates.append((w.start_char, w.end_char, w.upos))
+
+    # Skip quoted words
+    for start, end, tag in candidates:
+        pre = text[start-1] if start > 0 else ""
+        post = text[end] if end < len(text) else ""
+        if (pre and pre in "'‘’") or (post and post in "'‘’"):
+            continue
+        spans.append((start, end, tag))
 
-    # Merge overlaps
+    # Merge overlaps (the merged span keeps the first span's tag)
     spans = sorted(set(spans))
     merged = []
-    for s, e in spans:
+    for s, e, tag in spans:
         if not merged or s > merged[-1][1]:
-            merged.append([s, e])
+            merged.append([s, e, tag])
         else:
             merged[-1][1] = max(merged[-1][1], e)
 
-    # Rebuild without quotes
-    out, i = [], 0
-    for s, e in merged:
-        out.append(text[i:s]); out.append(text[s:e]); i = e
-    out.append(text[i:])
-    return "".join(out)
+    return {"text": text, "spans": [tuple(span) for span in merged]}
+
+# Stages of the simplification pipeline, in order, as reported to on_stage.
+SIMPLIFY_STAGES = ("detect_language", "pos", "summarize", "simplify", "highlight")
 
-def simplify_text_with_nlp(text, target_language='tel_Telu', simplify_vocab=True, split_sentences=True, target_words=100):
+def simplify_text_with_nlp(text, target_language='tel_Telu', simplify_vocab=True, split_sentences=True, target_words=100,
+                           tier=None, deadline=None, cancel=None):
     """
     Advanced text simplification that uses NLP functions:
     1. Identify key nouns first
     2. Create a summary that preserves these nouns
     3. Apply simplification and highlighting
     """
+    return simplify_text_with_nlp_detailed(text, target_language, simplify_vocab, split_sentences, target_words,
+                                           tier, deadline, cancel=cancel)["text"]
+
+def simplify_text_with_nlp_detailed(text, target_language='tel_Telu', simplify_vocab=True, split_sentences=True, target_words=100,
+                                    tier=None, deadline=None, on_partial=None, on_stage=None, cancel=None):
+    """
+    Same pipeline as simplify_text_with_nlp, but returns a dict with the
+    simplified "text", its noun "spans" as (start, end, tag) and how it was produced:
+    - "summary_path": "noun-extractive", "abstractive-<device>[-chunked]", "truncate",
+      or when `deadline` (seconds) applies, "extractive-estimate" (the summarizer
+      was predicted to miss it) or "extractive-timeout" (it ran over)
+    - "tier": the model tier that served it ("fast" or "quality"; see choose_tier)
+    - "cache_hit": whether the result came from the result cache
+
+    With on_partial, an abstractive summary is streamed: on_partial(text) is
+    called with the simplified summary so far as tokens are decoded, and the
+    path gets a "-streamed" suffix (streaming decodes greedily).
+
+    on_stage(stage) is called as each stage in SIMPLIFY_STAGES starts; stages
+    that don't apply (POS tagging for English) and cache hits report nothing.
+
+    cancel is an optional threading.Event. Once it is set the run stops with
+    RequestCancelledError at the next stage or decoding step, and nothing is cached.
+    """
+    global _inflight
+    deadline = SIMPLIFY_DEADLINE if deadline is None else deadline
+    deadline_at = time.monotonic() + deadline if deadline else None
     if not text.strip():
-        return ""
+        return {"text": "", "spans": [], "summary_path": None, "tier": None, "cache_hit": False}
+
+    tier = choose_tier(text, tier)
+    cache_keys = [_result_cache_key(text, target_language, simplify_vocab, split_sentences, target_words, tier)]
+    if on_partial is not None:
+        # A cached beam-search result beats streaming; streamed results are stored apart.
+        cache_keys.append(_result_cache_key(text, target_language, simplify_vocab, split_sentences, target_words,
+                                            tier, streamed=True))
+    for cache_key in cache_keys:
+        cached = _result_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached, cache_hit=True)
+
+    with _inflight_lock:
+        _inflight += 1
+    try:
+        result = _simplify_uncached(text, target_language, simplify_vocab, split_sentences, target_words, tier,
+                                    deadline_at, on_partial, on_stage, cancel)
+    finally:
+        with _inflight_lock:
+            _inflight -= 1
+    # A "truncate" result may just mean the summarizer is down, and an
+    # extractive one that the deadline was tight; don't pin either.
+    if result["summary_path"] not in ("truncate", "extractive-estimate", "extractive-timeout"):
+        _result_cache.put(cache_keys[-1], result)
+    return dict(result, cache_hit=False)
+
+def _simplify_uncached(text, target_language, simplify_vocab, split_sentences, target_words, tier="quality",
+                       deadline_at=None, on_partial=None, on_stage=None, cancel=None):
+    def stage(name):
+        # Stage boundaries are where a cancelled run gives up
+        _check_cancelled(cancel)
+        if on_stage is not None:
+            on_stage(name)
 
     # Detect if text is Telugu (contains Telugu characters)
+    stage("detect_language")
     is_telugu = bool(re.search(TELUGU, text))
 
-    # Step 1: Identify key nouns
-    key_nouns = []
-    if is_telugu and nlp is not None:
-        doc = nlp(text)
-        for sentence in doc.sentences:
-            for word in sentence.words:
-                if word.upos in {"NOUN", "PROPN"}:
-                    key_nouns.append(word.text)
+    # Step 1: Identify key nouns (one POS pass, reused by the later steps)
+    annotations = None
+    if is_telugu:
+        stage("pos")
+        annotations = analyze_pos(text)
+    key_nouns = [word for sentence in annotations or [] for word, _, _, upos in sentence["words"]
+                 if upos in NOUN_TAGS]
 
     # Step 2: Create summary that preserves key nouns
-    if is_telugu:
-        summarized_text = _create_noun_preserving_summary(text, key_nouns, target_words, is_telugu)
+    stage("summarize")
+    summary_nouns = None
+    if is_telugu and key_nouns:
+        sentences, picks = _select_noun_sentences(text, key_nouns, target_words, is_telugu)
+        summarized_text = _join_summary(sentences, picks, is_telugu)
+        summary_nouns = _project_summary_nouns(annotations, sentences, picks)
+        summary_path = "noun-extractive"
     else:
-        summarized_text = _basic_summarize_text(text, target_words)
+        stream = None
+        if on_partial is not None:
+            def stream(partial):
+                on_partial(_basic_simplify_text(partial, simplify_vocab, split_sentences, target_words))
+        summarized_text, summary_path = _summarize_with_path(text, target_words, tier, deadline_at, stream, cancel)
+        if annotations is not None:
+            summary_nouns = []  # tagged already and found no nouns
 
     # Step 3: Apply additional simplification
+    stage("simplify")
     simplified_text = _basic_simplify_text(summarized_text, simplify_vocab, split_sentences, target_words)
 
     # Step 4: Highlight nouns in the final text (only for Telugu)
     if is_telugu:
-        final_text = highlight_nouns_with_fallback(simplified_text)
+        stage("highlight")
+        highlighted = highlight_nouns_with_fallback(simplified_text, nouns=summary_nouns)
+        final_text, spans = highlighted["text"], highlighted["spans"]
     else:
-        final_text = simplified_text
+        final_text, spans = simplified_text, []
+
+    return {"text": final_text, "spans": spans, "summary_path": summary_path, "tier": tier}
 
-    return final_text
+class NounMatcher:
+    """Aho-Corasick automaton over a weighted set of nouns.
+
+    score(sentence) equals the sum of weights[noun] over every noun that is a
+    substring of sentence, but takes one pass over the sentence instead of
+    one substring search per noun.
+    """
+
+    def __init__(self, weights):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        self.weights = []
+        self.base = 0  # an empty noun is a substring of everything
+        for noun, weight in weights.items():
+            if not noun:
+                self.base += weight
+                continue
+            state = 0
+            for ch in noun:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[state][ch] = nxt
+                state = nxt
+            self.out[state].append(len(self.weights))
+            self.weights.append(weight)
+
+        # Breadth-first pass to build failure links and merged outputs
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def score(self, sentence):
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        found = set()
+        for ch in sentence:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return self.base + sum(self.weights[i] for i in found)
 
 def _create_noun_preserving_summary(text, key_nouns, target_words, is_telugu):
     """
@@ -150,56 +1285,67 @@ def _create_noun_preserving_summary(text, key_nouns, target_words, is_telugu):
     if not key_nouns:
         return _basic_summarize_text(text, target_words)
 
-    # Split into sentences
-    if is_telugu:
-        # For Telugu, split on common sentence endings
-        sentences = re.split(r'[।\.\!\?]', text)
-    else:
-        sentences = re.split(r'[.!?]', text)
+    sentences, picks = _select_noun_sentences(text, key_nouns, target_words, is_telugu)
+    return _join_summary(sentences, picks, is_telugu)
 
-    sentences = [s.strip() for s in sentences if s.strip()]
+def _select_noun_sentences(text, key_nouns, target_words, is_telugu):
+    """
+    Pick summary sentences, preferring those containing key nouns.
+    Returns (sentences, picks) where picks is an ordered list of
+    (sentence_index, word_limit); word_limit is None for a whole sentence.
+    """
+    # Split into sentences (for Telugu, also on the danda)
+    sentences = [text[start:end] for start, end in _split_sentence_spans(text, is_telugu)]
 
-    # Score sentences based on noun presence
-    scored_sentences = []
-    for sentence in sentences:
-        score = 0
-        for noun in key_nouns:
-            if noun in sentence:
-                score += 1
-        scored_sentences.append((sentence, score))
+    # Score sentences based on noun presence: each distinct noun found in a
+    # sentence adds the number of times it occurs in key_nouns
+    matcher = NounMatcher(Counter(key_nouns))
+    scored_sentences = [(i, matcher.score(sentence)) for i, sentence in enumerate(sentences)]
 
     # Sort by score (highest first) and take top sentences
     scored_sentences.sort(key=lambda x: x[1], reverse=True)
 
     # Build summary with sentences containing nouns first
+    picks = []
     summary_sentences = []
     word_count = 0
 
-    for sentence, score in scored_sentences:
+    for i, score in scored_sentences:
         if score > 0:  # Prioritize sentences with nouns
-            sentence_words = len(sentence.split())
+            sentence_words = len(sentences[i].split())
             if word_count + sentence_words <= target_words:
-                summary_sentences.append(sentence)
+                picks.append((i, None))
+                summary_sentences.append(sentences[i])
                 word_count += sentence_words
             else:
                 # Take partial sentence if needed
                 remaining_words = target_words - word_count
                 if remaining_words > 0:
-                    words = sentence.split()[:remaining_words]
-                    summary_sentences.append(' '.join(words))
+                    picks.append((i, remaining_words))
+                    summary_sentences.append(' '.join(sentences[i].split()[:remaining_words]))
                 break
 
     # If we don't have enough content, add more sentences
     if word_count < target_words * 0.7:  # Less than 70% of target
-        for sentence, score in scored_sentences:
-            if sentence not in summary_sentences:
-                sentence_words = len(sentence.split())
+        for i, score in scored_sentences:
+            if sentences[i] not in summary_sentences:
+                sentence_words = len(sentences[i].split())
                 if word_count + sentence_words <= target_words:
-                    summary_sentences.append(sentence)
+                    picks.append((i, None))
+                    summary_sentences.append(sentences[i])
                     word_count += sentence_words
                 else:
                     break
 
+    return sentences, picks
+
+def _join_summary(sentences, picks, is_telugu):
+    """Build the summary string for picks from _select_noun_sentences."""
+    summary_sentences = [
+        sentences[i] if word_limit is None else ' '.join(sentences[i].split()[:word_limit])
+        for i, word_limit in picks
+    ]
+
     # Join sentences
     if is_telugu:
         summary = '। '.join(summary_sentences)
@@ -212,32 +1358,327 @@ def _create_noun_preserving_summary(text, key_nouns, target_words, is_telugu):
 
     return summary
 
-def _basic_summarize_text(text, target_words):
+def _project_summary_nouns(annotations, sentences, picks):
+    """(word, upos) for every noun that made it into the summary, in summary
+    order, taken from the document's POS annotations instead of re-tagging."""
+    nouns = []
+    for i, word_limit in picks:
+        sentence = annotations[i]
+        cut = sentence["end"]
+        if word_limit is not None:
+            # Only nouns inside the first word_limit words survive truncation
+            word_ends = [m.end() for m in re.finditer(r'\S+', sentences[i])]
+            cut = sentence["start"] + word_ends[min(word_limit, len(word_ends)) - 1]
+        nouns.extend((word, upos) for word, start, end, upos in sentence["words"]
+                     if upos in NOUN_TAGS and end <= cut)
+    return nouns
+
+def _basic_summarize_text(text, target_words, tier="quality"):
     """LLM-based abstractive summarization with graceful fallback.
     Attempts to use a Hugging Face summarization pipeline; if unavailable,
     falls back to previous simple extractive logic.
     """
+    return _summarize_with_path(text, target_words, tier)[0]
+
+def _window_budget(tokenizer):
+    """Input tokens per summarizer call, leaving room for special tokens."""
+    limit = min(tokenizer.model_max_length or SUMMARIZER_WINDOW_TOKENS, SUMMARIZER_WINDOW_TOKENS)
+    return limit - tokenizer.num_special_tokens_to_add()
+
+def _length_bounds(tokenizer, text, target_words):
+    """min_length/max_length in real tokens for a summary of about target_words,
+    using the tokens-per-word ratio measured on text."""
+    n_words = max(1, len(text.split()))
+    n_tokens = len(tokenizer(text, add_special_tokens=False)["input_ids"])
+    tokens_per_word = max(1.0, n_tokens / n_words)
+    min_len = max(5, int(target_words * 0.5 * tokens_per_word))
+    max_len = max(min_len + 5, int(target_words * 1.2 * tokens_per_word))
+    return min_len, min(SUMMARIZER_WINDOW_TOKENS, max_len)
+
+def _token_windows(tokenizer, text, budget):
+    """Split text at sentence boundaries into windows of at most budget tokens.
+    A single sentence longer than the budget becomes its own window and is
+    truncated by the pipeline."""
+    sentences = [s for s in re.split(r'(?<=[.!?।])\s+', text.strip()) if s]
+    lengths = [len(ids) for ids in tokenizer(sentences, add_special_tokens=False)["input_ids"]]
+    windows, current, used = [], [], 0
+    for sentence, n in zip(sentences, lengths):
+        if current and used + n > budget:
+            windows.append(" ".join(current))
+            current, used = [], 0
+        current.append(sentence)
+        used += n
+    if current:
+        windows.append(" ".join(current))
+    return windows
+
+def _check_deadline(deadline_at):
+    # DeadlineCriteria stops generate() with a cut-off summary; treat that as a miss.
+    if deadline_at is not None and time.monotonic() >= deadline_at:
+        raise DeadlineExceededError("summarization ran past the deadline")
+
+def _check_cancelled(cancel):
+    if cancel is not None and cancel.is_set():
+        raise RequestCancelledError("request was cancelled")
+
+# Per-tokenizer lookup tables for WordBudgetCriteria, keyed by name_or_path.
+_word_tables = {}
+_word_tables_lock = threading.Lock()
+
+def _word_tables_for(tokenizer):
+    """Boolean tensors over the vocabulary: (starts_word, ends_sentence, special)."""
+    import torch
+    key = getattr(tokenizer, "name_or_path", None) or id(tokenizer)
+    with _word_tables_lock:
+        if key not in _word_tables:
+            tokens = tokenizer.convert_ids_to_tokens(list(range(len(tokenizer))))
+            special = set(tokenizer.all_special_ids)
+            # "Ġ" marks a leading space in byte-level BPE (BART), "▁" in SentencePiece (NLLB)
+            starts = [t is not None and t[:1] in ("Ġ", "▁") for t in tokens]
+            ends = [t is not None and t.rstrip().endswith((".", "!", "?", "।")) for t in tokens]
+            _word_tables[key] = (
+                torch.tensor(starts, dtype=torch.bool),
+                torch.tensor(ends, dtype=torch.bool),
+                torch.tensor([i in special for i in range(len(tokens))], dtype=torch.bool),
+            )
+        return _word_tables[key]
+
+class WordBudgetCriteria(StoppingCriteria):
+    """Stops generation once a sequence has used its word budget.
+
+    A sequence is done when it has started more than target_words words (the
+    rest would be cut off), or when it has just finished a sentence with at
+    least min_fraction of the budget used. Words are counted from the decoded
+    token ids with precomputed vocabulary tables, without detokenizing. Beam
+    search stops once every beam is done.
+    """
+
+    def __init__(self, tokenizer, target_words, min_fraction=0.9):
+        self.starts, self.ends, self.special = _word_tables_for(tokenizer)
+        self.target_words = target_words
+        self.min_words = max(1, int(target_words * min_fraction))
+
+    def __call__(self, input_ids, scores, **kwargs):
+        import torch
+        ids = input_ids.clamp(max=len(self.special) - 1).cpu()
+        content = ~self.special[ids]
+        # The first content token starts a word even without a space marker
+        after_special = torch.ones_like(content)
+        after_special[:, 1:] = ~content[:, :-1]
+        words = (content & (self.starts[ids] | after_special)).sum(dim=1)
+        sentence_done = self.ends[ids[:, -1]] & content[:, -1]
+        done = (words > self.target_words) | (sentence_done & (words >= self.min_words))
+        return done.to(input_ids.device)
+
+class CancelCriteria(StoppingCriteria):
+    """Stops generation at the next decoding step once `cancel` is set."""
+
+    def __init__(self, cancel):
+        self.cancel = cancel
+
+    def __call__(self, input_ids, scores, **kwargs):
+        import torch
+        return torch.full((input_ids.shape[0],), self.cancel.is_set(), dtype=torch.bool, device=input_ids.device)
+
+class DeadlineCriteria(StoppingCriteria):
+    """Stops generation once time.monotonic() reaches deadline_at.
+
+    Unlike max_time, which restarts with every generate() call, the deadline
+    is absolute, so the batches of a pipeline call and the map and reduce
+    steps all share one budget.
+    """
+
+    def __init__(self, deadline_at):
+        self.deadline_at = deadline_at
+
+    def __call__(self, input_ids, scores, **kwargs):
+        import torch
+        done = time.monotonic() >= self.deadline_at
+        return torch.full((input_ids.shape[0],), done, dtype=torch.bool, device=input_ids.device)
+
+def _stopping_criteria(tokenizer, target_words=None, cancel=None, deadline_at=None):
+    """generate() kwargs that stop decoding at target_words words (when
+    SUMMARIZER_EARLY_STOP is on), when cancel is set and at deadline_at."""
+    criteria = []
+    if deadline_at is not None:
+        criteria.append(DeadlineCriteria(deadline_at))
+    if target_words is not None and SUMMARIZER_EARLY_STOP:
+        criteria.append(WordBudgetCriteria(tokenizer, target_words))
+    if cancel is not None:
+        criteria.append(CancelCriteria(cancel))
+    return {"stopping_criteria": StoppingCriteriaList(criteria)} if criteria else {}
+
+def _stream_generate(model, tokenizer, inputs, **generate_kwargs):
+    """Run model.generate on a background thread and yield the decoded text
+    so far each time new tokens arrive. Decoding is greedy, as streamers do
+    not support beam search."""
+    from transformers import TextIteratorStreamer
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+    errors = []
+
+    def run():
+        try:
+            model.generate(**inputs, streamer=streamer, num_beams=1, do_sample=False, **generate_kwargs)
+        except Exception as e:
+            errors.append(e)
+            streamer.end()  # unblock the consumer
+
+    thread = threading.Thread(target=run, name="generate-stream", daemon=True)
+    thread.start()
+    text = ""
+    for piece in streamer:
+        text += piece
+        yield text
+    thread.join()
+    if errors:
+        raise errors[0]
+
+def _stream_summary(summarizer, text, on_partial, **generate_kwargs):
+    """One summarizer call with its output streamed to on_partial."""
+    tokenizer = summarizer.tokenizer
+    max_length = _window_budget(tokenizer) + tokenizer.num_special_tokens_to_add()
+    inputs = tokenizer(text, truncation=True, max_length=max_length, return_tensors="pt")
+    inputs = {name: tensor.to(summarizer.device) for name, tensor in inputs.items()}
+    summary = ""
+    for summary in _stream_generate(summarizer.model, tokenizer, inputs, **generate_kwargs):
+        if summary.strip():
+            on_partial(summary)
+    return summary.strip()
+
+def _map_reduce_summarize(summarizer, text, target_words, depth=0, deadline_at=None, on_partial=None, cancel=None):
+    """Summarise text of any length; returns (summary, number_of_map_windows).
+    With on_partial only the final call is streamed; map calls run batched."""
+    tokenizer = summarizer.tokenizer
+    budget = _window_budget(tokenizer)
+    windows = _token_windows(tokenizer, text, budget) if SUMMARIZER_CHUNKED else [text]
+
+    if len(windows) == 1 or depth >= 3:
+        _check_deadline(deadline_at)
+        min_len, max_len = _length_bounds(tokenizer, text, target_words)
+        limits = dict(min_length=min_len, max_length=max_len,
+                      **_stopping_criteria(tokenizer, target_words, cancel, deadline_at))
+        if on_partial is not None:
+            summary = _stream_summary(summarizer, text, on_partial, **limits)
+        else:
+            output = summarizer(text, do_sample=False, truncation=True, **limits)
+            summary = output[0].get("summary_text", "").strip()
+        _check_cancelled(cancel)
+        _check_deadline(deadline_at)
+        return summary, 1
+
+    # Map: size each window's summary so that all of them fit in one reduce window.
+    tokens_per_word = max(1.0, len(tokenizer(text, add_special_tokens=False)["input_ids"]) / max(1, len(text.split())))
+    window_words = max(20, min(target_words, int(budget / len(windows) / tokens_per_word / 1.2)))
+    min_len, max_len = _length_bounds(tokenizer, text, window_words)
+    limits = _stopping_criteria(tokenizer, window_words, cancel, deadline_at)
+    outputs = []
+    # One pipeline call per batch, so a deadline or cancel is noticed between batches
+    for i in range(0, len(windows), SUMMARIZER_BATCH_SIZE):
+        _check_cancelled(cancel)
+        _check_deadline(deadline_at)
+        outputs.extend(summarizer(windows[i:i + SUMMARIZER_BATCH_SIZE], min_length=min_len, max_length=max_len,
+                                  do_sample=False, truncation=True, batch_size=SUMMARIZER_BATCH_SIZE, **limits))
+    _check_cancelled(cancel)
+    _check_deadline(deadline_at)
+    partial = " ".join(o.get("summary_text", "").strip() for o in outputs)
+
+    # Reduce: summarise the joined partial summaries down to target_words
+    summary, _ = _map_reduce_summarize(summarizer, partial, target_words, depth + 1, deadline_at, on_partial, cancel)
+    return summary, len(windows)
+
+# Observed summarizer speed per registry entry: seconds per token of work,
+# where work is input tokens plus the output tokens allowed (see _summary_work).
+_summarizer_speed = {}
+_summarizer_speed_lock = threading.Lock()
+
+def _summary_work(tokenizer, text, target_words):
+    """Tokens a summary of text will process: the input, plus max_length for
+    every map window and for the reduce step."""
+    n_tokens = len(tokenizer(text, add_special_tokens=False)["input_ids"])
+    n_windows = -(-n_tokens // _window_budget(tokenizer)) if SUMMARIZER_CHUNKED else 1
+    _, max_len = _length_bounds(tokenizer, text, target_words)
+    return n_tokens + max_len * (n_windows + 1 if n_windows > 1 else 1)
+
+def _record_summarizer_speed(name, work, seconds):
+    with _summarizer_speed_lock:
+        rate = seconds / max(1, work)
+        previous = _summarizer_speed.get(name)
+        # Exponential moving average, so load changes show up within a few requests
+        _summarizer_speed[name] = rate if previous is None else 0.7 * previous + 0.3 * rate
+
+def _estimate_summary_seconds(name, work):
+    """Predicted seconds for `work` tokens, or None before the first observation."""
+    rate = _summarizer_speed.get(name)
+    return None if rate is None else rate * work
+
+def _extractive_summary(text, target_words, is_telugu):
+    """Summary built from the sentences richest in repeated terms, kept in
+    document order; no model involved, so it is fast enough for any deadline."""
+    words = [w.strip(".,;:!?\"'()[]।") for w in text.split()]
+    counts = Counter(words)
+    key_terms = [w for w in words if len(w) >= 4 and counts[w] >= 2]
+    sentences, picks = _select_noun_sentences(text, key_terms, target_words, is_telugu)
+    if not picks and sentences:
+        # Nothing scored and the first sentence alone is over budget: cut it
+        # to the budget, as the scored picks are, rather than return nothing.
+        picks = [(0, target_words)]
+    return _join_summary(sentences, sorted(picks), is_telugu)
+
+def _summarize_with_path(text, target_words, tier="quality", deadline_at=None, on_partial=None, cancel=None):
+    """Like _basic_summarize_text, but returns (summary, path) where path says
+    which route served it: "abstractive-<device|onnx>", "abstractive-<device|onnx>-chunked"
+    (map-reduce over windows, for inputs longer than the model window) or "truncate".
+
+    With deadline_at (a time.monotonic() value) the summarizer is skipped when
+    it is not loaded or its observed speed predicts a miss ("extractive-estimate"),
+    and abandoned when it runs over ("extractive-timeout").
+
+    With on_partial, the final summary is streamed to on_partial(text) as it
+    is decoded and the path ends in "-streamed".
+
+    A set cancel event raises RequestCancelledError instead of falling back.
+    """
     if not text or not text.strip():
-        return ""
+        return "", None
+    name = _model_key("summarizer", tier)
+    is_telugu = bool(re.search(TELUGU, text))
+    work = start = None
     try:
-        from transformers import pipeline
-        global _summarizer
-        try:
-            _summarizer
-        except NameError:
-            # Load a widely used summarization model.
-            _summarizer = pipeline("summarization", model="facebook/bart-large-cnn",device='cuda')
-
-        # Heuristic lengths (pipeline works in tokens, but we approximate via words).
-        min_len = max(5, int(target_words * 0.5))
-        max_len = max(min_len + 5, int(target_words * 1.2))
-        max_len = min(1024, max_len)
-        summary_output = _summarizer(text, min_length=min_len, max_length=max_len, do_sample=False)
-        if isinstance(summary_output, list) and summary_output:
-            candidate = summary_output[0].get("summary_text", "").strip()
-            if candidate:
-                return candidate
+        if deadline_at is not None and name not in registry.loaded():
+            # Loading the weights alone takes longer than any useful deadline,
+            # but start it, so later requests get the abstractive summary again.
+            registry.load_in_background(name)
+            return _extractive_summary(text, target_words, is_telugu), "extractive-estimate"
+        _summarizer = _get_summarizer(tier)
+
+        work = _summary_work(_summarizer.tokenizer, text, target_words)
+        if deadline_at is not None:
+            estimate = _estimate_summary_seconds(name, work)
+            if estimate is not None and estimate > deadline_at - time.monotonic():
+                return _extractive_summary(text, target_words, is_telugu), "extractive-estimate"
+        start = time.monotonic()
+        candidate, n_windows = _map_reduce_summarize(_summarizer, text, target_words, deadline_at=deadline_at,
+                                                     on_partial=on_partial, cancel=cancel)
+        _record_summarizer_speed(name, work, time.monotonic() - start)
+        if candidate:
+            engine = "onnx" if SUMMARIZER_BACKEND == "onnx" else _summarizer.device.type
+            path = f"abstractive-{engine}"
+            if n_windows > 1:
+                path += "-chunked"
+            if on_partial is not None:
+                path += "-streamed"
+            return candidate, path
         # If pipeline returns nothing meaningful, fall through to fallback.
+    except ModelUnavailableError as e:
+        # Load already failed recently; don't pay for another attempt.
+        print(e)
+    except RequestCancelledError:
+        raise
+    except DeadlineExceededError as e:
+        # The run was cut short, so its speed is a lower bound on the real cost.
+        _record_summarizer_speed(name, work, time.monotonic() - start)
+        print(f"{e}; using an extractive summary")
+        return _extractive_summary(text, target_words, is_telugu), "extractive-timeout"
     except Exception as e:
         pass
         print(e)
@@ -245,13 +1686,13 @@ def _basic_summarize_text(text, target_words):
     # Fallback: original simple extractive summarization.
     words = text.split()
     if len(words) <= target_words:
-        return text
+        return text, "truncate"
     summary_words = words[:target_words]
     summary = ' '.join(summary_words)
     # last_sentence_end = max(summary.rfind('.'), summary.rfind('!'), summary.rfind('?'))
     # if last_sentence_end > len(summary) * 0.5:
     #     summary = summary[:last_sentence_end + 1]
-    return summary
+    return summary, "truncate"
 
 def _basic_simplify_text(txt, simplify_vocab=True, split_sentences=True, target_words=100):
     """Basic text simplification logic"""
@@ -311,37 +1752,300 @@ def _basic_simplify_text(txt, simplify_vocab=True, split_sentences=True, target_
 #     except Exception as e:
 #         raise Exception(f"TTS generation failed: {e}")
 
-def generate_tts_audio(text, lang='en', speed=1.0):
-    """
-    Generate TTS audio for the given text and language using gTTS.
-    Optionally adjust playback speed using pydub.
-    Returns a BytesIO object containing the audio data.
+class TTSEngine:
+    """Interface for the speech engines generate_tts_audio dispatches through.
+
+    synthesize() returns the audio bytes for one piece of text, in the
+    container named by `format`.
     """
-    try:
-        tts = gTTS(text, lang=lang, slow=False)
+    name = None
+    format = "mp3"
+
+    def synthesize(self, text, lang):
+        raise NotImplementedError
+
+
+class GTTSEngine(TTSEngine):
+    """Google Translate TTS; needs a network round-trip per call."""
+    name = "gtts"
+    format = "mp3"
+
+    def synthesize(self, text, lang):
         audio_file = io.BytesIO()
-        tts.write_to_fp(audio_file)
-        audio_file.seek(0)
+        gTTS(text, lang=lang, slow=False).write_to_fp(audio_file)
+        return audio_file.getvalue()
+
+
+class EspeakEngine(TTSEngine):
+    """Local espeak-ng (or espeak) binary; works without network access."""
+    name = "espeak"
+    format = "wav"
+
+    def __init__(self, binary=None):
+        self.binary = binary or shutil.which("espeak-ng") or shutil.which("espeak") or "espeak-ng"
+
+    def synthesize(self, text, lang):
+        result = subprocess.run(
+            [self.binary, "-v", lang, "--stdout", text],
+            capture_output=True, check=True, timeout=120,
+        )
+        return result.stdout
+
 
-        # If speed is not 1.0, adjust using pydub
-        if speed != 1.0:
-            audio = AudioSegment.from_mp3(audio_file)
+class Pyttsx3Engine(TTSEngine):
+    """pyttsx3 with the platform's local voices (espeak on Linux)."""
+    name = "pyttsx3"
+    format = "wav"
+    _lock = threading.Lock()  # pyttsx3 drivers are not thread-safe
 
-            # Adjust speed (pydub uses frame_rate for speed control)
-            # Higher frame_rate = faster playback, lower = slower
-            original_frame_rate = audio.frame_rate
-            new_frame_rate = int(original_frame_rate * speed)
+    def synthesize(self, text, lang):
+        import pyttsx3
+        with self._lock, tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "speech.wav")
+            engine = pyttsx3.init()
+            for voice in engine.getProperty('voices'):
+                languages = [l.decode() if isinstance(l, bytes) else str(l) for l in (voice.languages or [])]
+                if any(lang in l for l in languages) or voice.id.split("/")[-1] == lang:
+                    engine.setProperty('voice', voice.id)
+                    break
+            engine.save_to_file(text, path)
+            engine.runAndWait()
+            with open(path, "rb") as f:
+                return f.read()
+
+
+TTS_ENGINES = {engine.name: engine for engine in (GTTSEngine(), EspeakEngine(), Pyttsx3Engine())}
+
+_tts_metrics = {}
+_tts_metrics_lock = threading.Lock()
+
+def _get_tts_engine(engine=None, lang='en'):
+    name = engine or TTS_ENGINE_BY_LANG.get(lang, TTS_ENGINE)
+    if name not in TTS_ENGINES:
+        raise ValueError(f"Unknown TTS engine '{name}'; choose from {sorted(TTS_ENGINES)}")
+    return TTS_ENGINES[name]
+
+def _engine_synthesize(engine, text, lang):
+    """Run one engine call and record its latency under (engine, lang)."""
+    start = time.time()
+    ok = False
+    try:
+        data = engine.synthesize(text, lang)
+        ok = True
+        return data
+    finally:
+        elapsed = time.time() - start
+        with _tts_metrics_lock:
+            m = _tts_metrics.setdefault((engine.name, lang), {
+                "calls": 0, "failures": 0, "chars": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            m["calls"] += 1
+            if ok:
+                m["chars"] += len(text)
+                m["total_seconds"] += elapsed
+                m["max_seconds"] = max(m["max_seconds"], elapsed)
+            else:
+                m["failures"] += 1
+
+def get_tts_metrics():
+    """Per-engine, per-language synthesis latency, for choosing engines."""
+    report = {}
+    with _tts_metrics_lock:
+        for (name, lang), m in _tts_metrics.items():
+            ok_calls = m["calls"] - m["failures"]
+            report.setdefault(name, {})[lang] = dict(
+                m,
+                mean_seconds=m["total_seconds"] / ok_calls if ok_calls else None,
+                seconds_per_100_chars=100 * m["total_seconds"] / m["chars"] if m["chars"] else None,
+            )
+    return report
+
+def _join_audio(parts, fmt):
+    """Join engine outputs in order into one MP3."""
+    if fmt == "mp3":
+        # MP3 is a stream of independent frames, so clips join by concatenation
+        # (gTTS does the same for its own internal chunks).
+        return b"".join(parts)
+    combined = AudioSegment.empty()
+    for part in parts:
+        combined += AudioSegment.from_file(io.BytesIO(part), format=fmt)
+    output_audio = io.BytesIO()
+    combined.export(output_audio, format='mp3')
+    return output_audio.getvalue()
+
+def generate_tts_audio(text, lang='en', speed=1.0, chunked=None, max_workers=None, engine=None, cancel=None):
+    """
+    Generate TTS audio for the given text and language.
+    Returns a BytesIO object containing MP3 audio data.
+    Clips are cached on disk by (text hash, lang, speed, engine).
+
+    engine names one of TTS_ENGINES; by default it comes from
+    TTS_ENGINE_BY_LANG for the language, else TTS_ENGINE.
+
+    With chunked=True (default: TTS_CHUNKED) the text is split into sentences
+    that are synthesised on up to max_workers threads and joined in order.
+
+    A speed other than 1.0 is applied to the cached 1.0x clip with a
+    pitch-preserving time-stretch, so it never triggers a new synthesis.
+    Players that can set playbackRate should request 1.0x and change speed there.
+
+    cancel is an optional threading.Event; once it is set, synthesis stops
+    before the next segment with RequestCancelledError. Finished segments stay cached.
+    """
+    _check_cancelled(cancel)
+    tts_engine = _get_tts_engine(engine, lang)
+    text_hash = make_key(unicodedata.normalize("NFC", text))
+    cache_key = make_key(text_hash, lang, round(float(speed), 2), tts_engine.name)
+    cached = _tts_cache.get(cache_key)
+    if cached is not None:
+        return io.BytesIO(cached)
+
+    if speed != 1.0:
+        base = generate_tts_audio(text, lang, 1.0, chunked, max_workers, tts_engine.name, cancel)
+        _check_cancelled(cancel)
+        try:
+            audio_file = _apply_speed(base, speed)
+        except Exception as e:
+            raise Exception(f"TTS generation failed: {e}")
+    else:
+        audio_file = _synthesize_tts(text, lang, tts_engine, chunked, max_workers, cancel)
+    _tts_cache.put(cache_key, audio_file.getvalue())
+    audio_file.seek(0)
+    return audio_file
+
+def _split_tts_segments(text, max_chars=TTS_SEGMENT_MAX_CHARS):
+    """Split text into one segment per sentence (English or Telugu endings).
+    Sentences longer than max_chars are split further at word boundaries."""
+    segments = []
+    for sentence in re.findall(r'[^.!?।]+[.!?।]*', text):
+        sentence = sentence.strip()
+        # Skip fragments with nothing to pronounce; engines reject them.
+        if not re.search(r'\w', sentence):
+            continue
+        if len(sentence) <= max_chars:
+            segments.append(sentence)
+            continue
+        piece = ""
+        for word in sentence.split():
+            if piece and len(piece) + 1 + len(word) > max_chars:
+                segments.append(piece)
+                piece = word
+            else:
+                piece = f"{piece} {word}" if piece else word
+        if piece:
+            segments.append(piece)
+    return segments
+
+def _synthesize_segment(segment, lang, engine, retries=TTS_SEGMENT_RETRIES):
+    """Audio bytes for one segment, retrying transient engine failures."""
+    for attempt in range(retries + 1):
+        try:
+            return _engine_synthesize(engine, segment, lang)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(0.5 * 2 ** attempt)
+
+def _synthesize_segments(segments, lang, engine, max_workers=None, cancel=None):
+    """Join the audio for all segments, synthesising only those not already
+    in the segment store."""
+
+    def synthesize(segment):
+        _check_cancelled(cancel)
+        return _synthesize_segment(segment, lang, engine)
+
+    keys = [make_key(unicodedata.normalize("NFC", segment), lang, engine.name) for segment in segments]
+    parts = [_tts_segment_cache.get(key) for key in keys]
+    missing = {}
+    for i, part in enumerate(parts):
+        if part is None:
+            missing.setdefault(keys[i], []).append(i)
 
-            # Apply speed change
-            audio = audio._spawn(audio.raw_data, overrides={
-                'frame_rate': new_frame_rate
-            }).set_frame_rate(original_frame_rate)
+    if missing:
+        todo = list(missing)
+        texts = [segments[missing[key][0]] for key in todo]
+        workers = max(1, min(max_workers or TTS_MAX_WORKERS, len(todo)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Store segments as they arrive, so a cancelled run keeps what it finished
+            for key, data in zip(todo, executor.map(synthesize, texts)):
+                _tts_segment_cache.put(key, data)
+                for i in missing[key]:
+                    parts[i] = data
+    return _join_audio(parts, engine.format)
 
-            output_audio = io.BytesIO()
-            audio.export(output_audio, format='mp3')
-            output_audio.seek(0)
-            return output_audio
+def time_stretch(samples, rate, sample_rate, frame_ms=40, search_ms=10):
+    """Pitch-preserving time-stretch of PCM samples (WSOLA).
 
+    samples is a (n,) or (n, channels) array; rate > 1 speeds speech up and
+    rate < 1 slows it down. Returns float32 samples in the same layout,
+    about n / rate long.
+    """
+    if rate == 1.0 or len(samples) == 0:
+        return samples
+    x = np.asarray(samples, dtype=np.float32)
+    mono = x.ndim == 1
+    if mono:
+        x = x[:, None]
+    n, channels = x.shape
+    frame = max(64, int(sample_rate * frame_ms / 1000)) // 2 * 2
+    hop_out = frame // 2
+    hop_in = hop_out * rate
+    tol = int(sample_rate * search_ms / 1000)
+    n_frames = max(1, int(max(0, n - frame) / hop_in) + 1)
+
+    # Pad so every candidate window lies inside the buffer.
+    xp = np.concatenate([np.zeros((tol, channels), np.float32), x,
+                         np.zeros((frame + 2 * tol + hop_out, channels), np.float32)])
+    guide = xp.mean(axis=1)
+    step = max(1, sample_rate // 8000)  # align on a ~8 kHz decimated signal
+
+    # Pick each analysis frame near its nominal position so that it best
+    # continues the previous frame (maximum cross-correlation).
+    positions = np.empty(n_frames, dtype=np.int64)
+    positions[0] = tol
+    for k in range(1, n_frames):
+        natural = positions[k - 1] + hop_out
+        template = guide[natural:natural + frame:step]
+        nominal = tol + int(round(k * hop_in))
+        region = guide[nominal - tol:nominal + tol + frame:step]
+        corr = np.correlate(region, template, mode="valid")
+        positions[k] = nominal - tol + int(np.argmax(corr)) * step
+
+    # Overlap-add with a periodic Hann window at 50% overlap (sums to one).
+    window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(frame) / frame)).astype(np.float32)
+    frames = xp[positions[:, None] + np.arange(frame)] * window[None, :, None]
+    blocks = np.zeros((n_frames + 1, hop_out, channels), np.float32)
+    blocks[:-1] += frames[:, :hop_out]
+    blocks[1:] += frames[:, hop_out:]
+    out = blocks.reshape(-1, channels)[:int(round(n / rate))]
+    return out[:, 0] if mono else out
+
+def _apply_speed(audio_file, speed):
+    """Decode an MP3 clip, time-stretch the PCM in memory and re-encode it."""
+    audio = AudioSegment.from_mp3(audio_file)
+    samples = np.array(audio.get_array_of_samples())
+    dtype = samples.dtype
+    if audio.channels > 1:
+        samples = samples.reshape(-1, audio.channels)
+    stretched = time_stretch(samples, speed, audio.frame_rate)
+    limits = np.iinfo(dtype)
+    pcm = np.clip(np.round(stretched), limits.min, limits.max).astype(dtype)
+    output_audio = io.BytesIO()
+    audio._spawn(pcm.tobytes()).export(output_audio, format='mp3')
+    output_audio.seek(0)
+    return output_audio
+
+def _synthesize_tts(text, lang, engine, chunked=None, max_workers=None, cancel=None):
+    try:
+        if chunked is None:
+            chunked = TTS_CHUNKED
+        segments = _split_tts_segments(text) if chunked else []
+        if segments:
+            audio_file = io.BytesIO(_synthesize_segments(segments, lang, engine, max_workers, cancel))
+        else:
+            audio_file = io.BytesIO(_join_audio([_engine_synthesize(engine, text, lang)], engine.format))
+        audio_file.seek(0)
         return audio_file
+    except RequestCancelledError:
+        raise
     except Exception as e:
         raise Exception(f"TTS generation failed: {e}")
\ No newline at end of file
@@ -0,0 +1,408 @@
+"""Benchmarks for the backend, run against the inputs logged in data/database.json.
+
+Usage (from src/):
+    python benchmarks.py scoring
+    python benchmarks.py precision --precisions fp32 int8 bf16
+    python benchmarks.py parity --backends transformers onnx
+    python benchmarks.py early-stop
+"""
+import argparse
+import difflib
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import backend
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../data/database.json")
+
+
+def load_logged_inputs(min_chars=0, max_chars=None):
+    with open(DB_PATH, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    return [
+        r for r in records
+        if len(r["input_text"]) >= min_chars and (max_chars is None or len(r["input_text"]) <= max_chars)
+    ]
+
+
+def _timeit(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _run_worker(command, env):
+    """Run a worker subcommand in a fresh process and return the JSON it wrote."""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        output = f.name
+    try:
+        subprocess.run([sys.executable, os.path.abspath(__file__)] + command + ["--output", output],
+                       env=dict(os.environ, **env), check=True)
+        with open(output, "r", encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        if os.path.exists(output):
+            os.remove(output)
+
+
+# ------------------------------
+# Sentence scoring
+# ------------------------------
+def _nested_loop_scores(sentences, key_nouns):
+    # The scoring loop _create_noun_preserving_summary used before NounMatcher
+    scores = []
+    for sentence in sentences:
+        score = 0
+        for noun in key_nouns:
+            if noun in sentence:
+                score += 1
+        scores.append(score)
+    return scores
+
+
+def _key_nouns(text):
+    """Key nouns from the Telugu tagger, or every word when it is unavailable
+    (a superset of the nouns, so an upper bound on the scoring cost)."""
+    annotations = backend.analyze_pos(text) if re.search(backend.TELUGU, text) else None
+    if annotations is None:
+        return text.split(), "words"
+    nouns = [w for s in annotations for w, _, _, upos in s["words"] if upos in backend.NOUN_TAGS]
+    return nouns, "stanza"
+
+
+def bench_scoring(args):
+    records = load_logged_inputs(args.min_chars, args.max_chars)
+    if not records:
+        print(f"No logged inputs between {args.min_chars} and {args.max_chars} characters.")
+        return
+    print(f"{'lang':<8} {'chars':>6} {'sents':>6} {'nouns':>6} {'source':>7} "
+          f"{'nested ms':>10} {'matcher ms':>11} {'speedup':>8}")
+    for record in records:
+        text = record["input_text"]
+        is_telugu = bool(re.search(backend.TELUGU, text))
+        sentences = [text[s:e] for s, e in backend._split_sentence_spans(text, is_telugu)]
+        key_nouns, source = _key_nouns(text)
+
+        old_time, old_scores = _timeit(lambda: _nested_loop_scores(sentences, key_nouns), args.repeat)
+
+        def indexed():
+            matcher = backend.NounMatcher(Counter(key_nouns))
+            return [matcher.score(sentence) for sentence in sentences]
+
+        new_time, new_scores = _timeit(indexed, args.repeat)
+        assert old_scores == new_scores, "NounMatcher scores differ from the nested loop"
+        lang = "te" if is_telugu else "en"
+        print(f"{lang:<8} {len(text):>6} {len(sentences):>6} {len(key_nouns):>6} {source:>7} "
+              f"{old_time * 1000:>10.2f} {new_time * 1000:>11.2f} {old_time / new_time:>7.1f}x")
+
+
+# ------------------------------
+# Inference precision
+# ------------------------------
+def _run_pipeline(text, target_words):
+    """Summarize and translate one input with the seq2seq models, bypassing
+    every cache. Returns (telugu_summary, summarize_seconds, translate_seconds)."""
+    def translate(text, source, target):
+        sentences = backend._split_translation_sentences(text)
+        return " ".join(backend._translate_uncached(sentences, source, target))
+
+    translate_time = 0.0
+    if re.search(backend.TELUGU, text):
+        start = time.perf_counter()
+        text = translate(text, "tel_Telu", "eng_Latn")
+        translate_time += time.perf_counter() - start
+    start = time.perf_counter()
+    summary, _ = backend._summarize_with_path(text, target_words)
+    summarize_time = time.perf_counter() - start
+    start = time.perf_counter()
+    summary = translate(summary, "eng_Latn", "tel_Telu")
+    translate_time += time.perf_counter() - start
+    return summary, summarize_time, translate_time
+
+
+def precision_worker(args):
+    # Runs in its own process (see bench_precision) so peak RSS belongs to
+    # one precision only; MODEL_PRECISION is set in the environment.
+    records = load_logged_inputs(args.min_chars, args.max_chars)[:args.limit]
+    start = time.perf_counter()
+    backend.registry.get("summarizer")
+    backend.registry.get("nllb")
+    load_seconds = time.perf_counter() - start
+
+    summaries, summarize_seconds, translate_seconds = [], [], []
+    for record in records:
+        summary, summarize_time, translate_time = _run_pipeline(
+            record["input_text"], int(record.get("target_words", 100)))
+        summaries.append(summary)
+        summarize_seconds.append(summarize_time)
+        translate_seconds.append(translate_time)
+
+    result = {
+        "precision": backend._effective_precision(backend._resolve_device()),
+        "load_seconds": load_seconds,
+        "summarize_seconds": summarize_seconds,
+        "translate_seconds": translate_seconds,
+        "summaries": summaries,
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False)
+
+
+class _WhitespaceTokenizer:
+    # rouge_score's default tokenizer drops non-ASCII text, i.e. all Telugu.
+    def tokenize(self, text):
+        return text.split()
+
+
+def _rouge2(hypotheses, references):
+    from rouge_score import rouge_scorer
+    scorer = rouge_scorer.RougeScorer(["rouge2"], tokenizer=_WhitespaceTokenizer())
+    scores = [scorer.score(ref, hyp)["rouge2"].fmeasure for ref, hyp in zip(references, hypotheses)]
+    return sum(scores) / len(scores)
+
+
+def _bertscore(hypotheses, references, model_type):
+    from bert_score import score
+    _, _, f1 = score(hypotheses, references, model_type=model_type, verbose=False)
+    return f1.mean().item()
+
+
+def bench_precision(args):
+    records = load_logged_inputs(args.min_chars, args.max_chars)[:args.limit]
+    if not records:
+        print(f"No logged inputs between {args.min_chars} and {args.max_chars} characters.")
+        return
+
+    command = ["precision-worker", "--min-chars", str(args.min_chars), "--limit", str(args.limit)]
+    if args.max_chars is not None:
+        command += ["--max-chars", str(args.max_chars)]
+
+    results = {}
+    for precision in args.precisions:
+        print(f"Running {precision} on {len(records)} inputs...")
+        results[precision] = _run_worker(command, {"MODEL_PRECISION": precision})
+
+    # Every precision is scored against the first one's outputs (fp32 by
+    # default): same language, same inputs, so the scores measure the drift
+    # that lower precision introduces. The baseline row scores 1.0.
+    references = results[args.precisions[0]]["summaries"]
+    print(f"\n{'precision':<10} {'effective':>9} {'load s':>7} {'summ ms':>8} {'trans ms':>9} "
+          f"{'peak RSS MB':>12} {'ROUGE-2':>8} {'BERTScore':>10}")
+    for precision, result in results.items():
+        n = len(result["summaries"])
+        rouge = _rouge2(result["summaries"], references)
+        if args.no_bertscore:
+            bert_col = f"{'-':>10}"
+        else:
+            bert_col = f"{_bertscore(result['summaries'], references, args.bertscore_model):>10.4f}"
+        print(f"{precision:<10} {result['precision']:>9} {result['load_seconds']:>7.1f} "
+              f"{sum(result['summarize_seconds']) / n * 1000:>8.0f} "
+              f"{sum(result['translate_seconds']) / n * 1000:>9.0f} "
+              f"{result['peak_rss_bytes'] / 2**20:>12.0f} {rouge:>8.4f} {bert_col}")
+    print(f"\nScores compare each precision's summaries with {args.precisions[0]}'s (1.0 = identical).")
+
+
+# ------------------------------
+# Execution backend parity
+# ------------------------------
+def parity_worker(args):
+    # English inputs go through _basic_summarize_text and their first sentences
+    # through English->Telugu translation; Telugu inputs are translated to
+    # English. Translation calls _translate_uncached, which is what
+    # convert_*_lang runs on a translation memory miss.
+    records = load_logged_inputs(args.min_chars, args.max_chars)[:args.limit]
+    summaries, translations, summarize_seconds, translate_seconds = [], [], 0.0, 0.0
+    for record in records:
+        text = record["input_text"]
+        is_telugu = bool(re.search(backend.TELUGU, text))
+        summary = None
+        if not is_telugu:
+            start = time.perf_counter()
+            summary = backend._basic_summarize_text(text, int(record.get("target_words", 100)))
+            summarize_seconds += time.perf_counter() - start
+        sentences = backend._split_translation_sentences(text)[:args.sentences]
+        source, target = ("tel_Telu", "eng_Latn") if is_telugu else ("eng_Latn", "tel_Telu")
+        start = time.perf_counter()
+        translations.append(backend._translate_uncached(sentences, source, target))
+        translate_seconds += time.perf_counter() - start
+        summaries.append(summary)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"summaries": summaries, "translations": translations,
+                   "summarize_seconds": summarize_seconds, "translate_seconds": translate_seconds},
+                  f, ensure_ascii=False)
+
+
+def _similarity(a, b):
+    return difflib.SequenceMatcher(None, a.split(), b.split()).ratio()
+
+
+def bench_parity(args):
+    records = load_logged_inputs(args.min_chars, args.max_chars)[:args.limit]
+    if not records:
+        print(f"No logged inputs between {args.min_chars} and {args.max_chars} characters.")
+        return
+    command = ["parity-worker", "--min-chars", str(args.min_chars), "--limit", str(args.limit),
+               "--sentences", str(args.sentences)]
+    if args.max_chars is not None:
+        command += ["--max-chars", str(args.max_chars)]
+
+    results = {}
+    for name in args.backends:
+        print(f"Running {name} on {len(records)} inputs...")
+        results[name] = _run_worker(command, {"SUMMARIZER_BACKEND": name, "TRANSLATOR_BACKEND": name})
+
+    baseline_name = args.backends[0]
+    baseline = results[baseline_name]
+    for name in args.backends[1:]:
+        result = results[name]
+        print(f"\n{name} vs {baseline_name}")
+        print(f"{'#':>3} {'lang':<5} {'summary':>8} {'sim':>6} {'sentences':>10} {'exact':>6} {'sim':>6}")
+        summary_exact = summary_total = sentence_exact = sentence_total = 0
+        for i, record in enumerate(records):
+            lang = "te" if re.search(backend.TELUGU, record["input_text"]) else "en"
+            base_summary, summary = baseline["summaries"][i], result["summaries"][i]
+            summary_cols = f"{'-':>8} {'-':>6}"
+            if base_summary is not None:
+                same = summary == base_summary
+                summary_exact += same
+                summary_total += 1
+                summary_cols = f"{'same' if same else 'differs':>8} {_similarity(base_summary, summary):>6.3f}"
+            pairs = list(zip(baseline["translations"][i], result["translations"][i]))
+            exact = sum(a == b for a, b in pairs)
+            sim = sum(_similarity(a, b) for a, b in pairs) / len(pairs) if pairs else 1.0
+            sentence_exact += exact
+            sentence_total += len(pairs)
+            print(f"{i:>3} {lang:<5} {summary_cols} {len(pairs):>10} {exact:>6} {sim:>6.3f}")
+        print(f"Summaries identical: {summary_exact}/{summary_total}; "
+              f"translated sentences identical: {sentence_exact}/{sentence_total}")
+        for stage in ("summarize", "translate"):
+            base_time, time_taken = baseline[f"{stage}_seconds"], result[f"{stage}_seconds"]
+            speedup = f"{base_time / time_taken:.2f}x" if time_taken else "-"
+            print(f"{stage}: {base_time:.1f}s -> {time_taken:.1f}s ({speedup})")
+
+
+# ------------------------------
+# Word-budget early stopping
+# ------------------------------
+class _CountingSummarizer:
+    """Wraps the summarization pipeline and counts generate() decode steps by
+    adding a stopping criterion that never stops."""
+
+    def __init__(self, summarizer):
+        self.summarizer = summarizer
+        self.tokenizer = summarizer.tokenizer
+        self.steps = 0
+
+    def _count(self, input_ids, scores, **kwargs):
+        import torch
+        self.steps += 1
+        return torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+
+    def __call__(self, inputs, **kwargs):
+        from transformers import StoppingCriteriaList
+        criteria = StoppingCriteriaList(kwargs.pop("stopping_criteria", []))
+        criteria.append(self._count)
+        return self.summarizer(inputs, stopping_criteria=criteria, **kwargs)
+
+
+def bench_early_stop(args):
+    records = [r for r in load_logged_inputs(args.min_chars, args.max_chars)
+               if not re.search(backend.TELUGU, r["input_text"])][:args.limit]
+    if not records:
+        print("No English logged inputs in range (the summarizer only runs on English text).")
+        return
+    summarizer = _CountingSummarizer(backend._get_summarizer())
+    configured = backend.SUMMARIZER_EARLY_STOP
+    print(f"{'words':>5} {'steps':>7} {'early':>7} {'saved':>6} {'secs':>7} {'early':>7} "
+          f"{'words out':>9} {'early':>6} {'ends at sentence':>16}")
+    for target_words in range(args.min_words, args.max_words + 1, args.step):
+        totals = {False: [0, 0.0, 0, 0], True: [0, 0.0, 0, 0]}  # steps, seconds, words, sentence ends
+        for record in records:
+            for early_stop in (False, True):
+                backend.SUMMARIZER_EARLY_STOP = early_stop
+                summarizer.steps = 0
+                start = time.perf_counter()
+                summary, _ = backend._map_reduce_summarize(summarizer, record["input_text"], target_words)
+                seconds = time.perf_counter() - start
+                simplified = backend._basic_simplify_text(summary, target_words=target_words)
+                total = totals[early_stop]
+                total[0] += summarizer.steps
+                total[1] += seconds
+                total[2] += len(simplified.split())
+                total[3] += not simplified.endswith("...")
+        n = len(records)
+        (base_steps, base_secs, base_words, _), (steps, secs, words, ends) = totals[False], totals[True]
+        saved = 1 - steps / base_steps if base_steps else 0.0
+        print(f"{target_words:>5} {base_steps / n:>7.0f} {steps / n:>7.0f} {saved:>6.0%} {base_secs / n:>7.2f} "
+              f"{secs / n:>7.2f} {base_words / n:>9.0f} {words / n:>6.0f} {ends:>10}/{n:<5}")
+    backend.SUMMARIZER_EARLY_STOP = configured
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("scoring", help="noun-to-sentence scoring in _create_noun_preserving_summary")
+    p.add_argument("--min-chars", type=int, default=5000)
+    p.add_argument("--max-chars", type=int, default=10000)
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_scoring)
+
+    p = sub.add_parser("precision", help="latency, peak RSS and output drift of int8/bf16 vs fp32 seq2seq inference")
+    p.add_argument("--precisions", nargs="+", default=["fp32", "int8", "bf16"])
+    p.add_argument("--min-chars", type=int, default=0)
+    p.add_argument("--max-chars", type=int, default=None)
+    p.add_argument("--limit", type=int, default=10)
+    p.add_argument("--bertscore-model", default="xlm-roberta-large")
+    p.add_argument("--no-bertscore", action="store_true")
+    p.set_defaults(func=bench_precision)
+
+    p = sub.add_parser("parity", help="output parity and speed of the transformers and onnx backends")
+    p.add_argument("--backends", nargs="+", default=["transformers", "onnx"])
+    p.add_argument("--min-chars", type=int, default=0)
+    p.add_argument("--max-chars", type=int, default=None)
+    p.add_argument("--limit", type=int, default=10)
+    p.add_argument("--sentences", type=int, default=20, help="sentences translated per input")
+    p.set_defaults(func=bench_parity)
+
+    p = sub.add_parser("early-stop", help="decode steps saved by stopping summaries at the word budget")
+    p.add_argument("--min-chars", type=int, default=0)
+    p.add_argument("--max-chars", type=int, default=None)
+    p.add_argument("--limit", type=int, default=10)
+    p.add_argument("--min-words", type=int, default=50)
+    p.add_argument("--max-words", type=int, default=300)
+    p.add_argument("--step", type=int, default=50)
+    p.set_defaults(func=bench_early_stop)
+
+    p = sub.add_parser("parity-worker", help=argparse.SUPPRESS)
+    p.add_argument("--output", required=True)
+    p.add_argument("--min-chars", type=int, default=0)
+    p.add_argument("--max-chars", type=int, default=None)
+    p.add_argument("--limit", type=int, default=10)
+    p.add_argument("--sentences", type=int, default=20)
+    p.set_defaults(func=parity_worker)
+
+    p = sub.add_parser("precision-worker", help=argparse.SUPPRESS)
+    p.add_argument("--output", required=True)
+    p.add_argument("--min-chars", type=int, default=0)
+    p.add_argument("--max-chars", type=int, default=None)
+    p.add_argument("--limit", type=int, default=10)
+    p.set_defaults(func=precision_worker)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
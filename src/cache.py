@@ -0,0 +1,303 @@
+"""Caching helpers shared by the backend.
+
+LRUCache is a bounded in-memory tier, DiskCache is a size-bounded directory of
+files that survives restarts, SQLiteStore keeps many small values in one file,
+and TieredCache puts a memory tier in front of a disk tier and counts hits
+and misses.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+# Root directory for all on-disk caches; each cache uses its own subdirectory.
+CACHE_ROOT = os.environ.get(
+    "SIMPLIFIER_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "../data/cache"),
+)
+
+
+def make_key(*parts):
+    """Stable sha256 hex digest of JSON-serialisable parts."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe in-memory cache holding at most `maxsize` entries."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DiskCache:
+    """One file per key under `directory`, bounded by total size.
+
+    Reads refresh a file's mtime, so pruning removes the least recently used
+    files first. Writes are atomic, so a crash never leaves a torn entry.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, suffix=".bin"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._total_bytes = sum(size for _, _, size in self._scan())
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + self.suffix)
+
+    def _scan(self):
+        """Yield (mtime, path, size) for every entry on disk."""
+        if not os.path.isdir(self.directory):
+            return
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(self.suffix):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield st.st_mtime, path, st.st_size
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path, None)
+            return data
+        except OSError:
+            return None
+
+    def put(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        with self._lock:
+            try:
+                self._total_bytes -= os.path.getsize(path)
+            except OSError:
+                pass
+            os.replace(tmp_path, path)
+            self._total_bytes += len(data)
+            if self._total_bytes > self.max_bytes:
+                self._prune()
+
+    def _prune(self):
+        # Drop the oldest entries until we are back under 90% of the budget,
+        # so we don't rescan the directory on every subsequent write.
+        entries = sorted(self._scan())
+        total = sum(size for _, _, size in entries)
+        target = self.max_bytes * 0.9
+        for _, path, size in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._total_bytes = total
+
+    def clear(self):
+        with self._lock:
+            for _, path, _ in list(self._scan()):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total_bytes = 0
+
+    def __len__(self):
+        return sum(1 for _ in self._scan())
+
+
+class SQLiteStore:
+    """Compact on-disk key/value store in a single SQLite file.
+
+    Suited to many small values (e.g. translated sentences) where one file per
+    entry would waste space. Holds at most `max_entries` rows; the oldest
+    writes are dropped first. put_many writes a batch in one transaction.
+    """
+
+    def __init__(self, path, max_entries=200000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+        self._count = 0  # rows in the table, kept up to date by the writes
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB, written REAL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_written ON entries (written)")
+            self._count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return self._conn
+
+    def get(self, key):
+        try:
+            with self._lock:
+                row = self._connect().execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        except (OSError, sqlite3.Error):
+            # An unreadable store is a miss, as in DiskCache.get
+            return None
+        return bytes(row[0]) if row else None
+
+    def put(self, key, data):
+        self.put_many([(key, data)])
+
+    def put_many(self, items):
+        """Write (key, data) pairs in a single transaction."""
+        items = list(items)
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            count = self._count
+            with conn:
+                for key, data in items:
+                    # Count new rows without a COUNT(*) scan per write
+                    if conn.execute("INSERT OR IGNORE INTO entries VALUES (?, ?, ?)",
+                                    (key, data, now)).rowcount:
+                        count += 1
+                    else:
+                        conn.execute("UPDATE entries SET value = ?, written = ? WHERE key = ?",
+                                     (data, now, key))
+                if count > self.max_entries:
+                    count -= conn.execute(
+                        "DELETE FROM entries WHERE key IN "
+                        "(SELECT key FROM entries ORDER BY written LIMIT ?)",
+                        (count - self.max_entries,)).rowcount
+            # Only reached once the transaction committed
+            self._count = count
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM entries")
+            self._count = 0
+
+    def __len__(self):
+        with self._lock:
+            self._connect()
+            return self._count
+
+
+class TieredCache:
+    """In-memory LRU in front of an optional DiskCache or SQLiteStore, with
+    hit/miss counters.
+
+    `encode`/`decode` convert values to and from the bytes stored on disk.
+    """
+
+    def __init__(self, memory, disk=None, encode=None, decode=None):
+        self.memory = memory
+        self.disk = disk
+        self.encode = encode or (lambda value: value)
+        self.decode = decode or (lambda data: data)
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits_memory += 1
+            return value
+        if self.disk is not None:
+            try:
+                data = self.disk.get(key)
+            except (OSError, sqlite3.Error) as e:
+                # A missing or unreadable disk tier must not break the request.
+                print(f"Warning: failed to read cache entry: {e}")
+                data = None
+            if data is not None:
+                try:
+                    value = self.decode(data)
+                except Exception:
+                    value = None
+                if value is not None:
+                    self.hits_disk += 1
+                    self.memory.put(key, value)
+                    return value
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self.put_many([(key, value)])
+
+    def put_many(self, items):
+        """Store (key, value) pairs, in one disk write when the disk tier
+        supports put_many."""
+        items = list(items)
+        for key, value in items:
+            self.memory.put(key, value)
+        if self.disk is None or not items:
+            return
+        try:
+            encoded = [(key, self.encode(value)) for key, value in items]
+            if hasattr(self.disk, "put_many"):
+                self.disk.put_many(encoded)
+            else:
+                for key, data in encoded:
+                    self.disk.put(key, data)
+        except (OSError, sqlite3.Error) as e:
+            # A full or read-only disk must not break the request.
+            print(f"Warning: failed to write cache entry: {e}")
+
+    def stats(self):
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        return {
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "hit_rate": (self.hits_memory + self.hits_disk) / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+        }
+
+
+def json_encode(value):
+    return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+
+def json_decode(data):
+    return json.loads(data.decode("utf-8"))
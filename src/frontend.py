@@ -12,7 +12,10 @@ import time
 import os
 
 # Import backend functions
-from backend import simplify_text_with_nlp, generate_tts_audio
+from backend import (simplify_text_with_nlp_detailed, generate_tts_audio, start_model_warmup, get_model_status,
+                     start_health_server,
+                     SIMPLIFY_STAGES, MODEL_TIER, MODEL_TIERS, SUMMARY_STREAMING)
+from jobs import JobManager, JOB_POLL_SECONDS
 
 # Compatibility for rerun
 # Removed deprecated st.experimental_rerun
@@ -73,6 +76,35 @@ def render_assistive_text(text, lang_code, opts):
     return ' '.join(assisted_words)
 
 
+def render_highlighted_text(text, spans, lang_code, opts):
+    """Apply reading assists and wrap precomputed noun spans in <span class="noun-hl">."""
+    if not spans:
+        return render_assistive_text(text, lang_code, opts)
+    pieces = []
+    i = 0
+    for start, end, tag in spans:
+        if start < i:
+            continue
+        pieces.append((text[i:start], None))
+        pieces.append((text[start:end], tag))
+        i = end
+    pieces.append((text[i:], None))
+
+    html = []
+    for piece, tag in pieces:
+        if not piece.strip():
+            html.append(" " if piece else "")
+            continue
+        # render_assistive_text re-joins words, so keep the piece's outer spaces
+        rendered = render_assistive_text(piece.strip(), lang_code, opts)
+        if tag:
+            rendered = f'<span class="noun-hl" title="{tag}">{rendered}</span>'
+        lead = " " if piece[0].isspace() else ""
+        trail = " " if piece[-1].isspace() else ""
+        html.append(lead + rendered + trail)
+    return "".join(html)
+
+
 def add_spacing(text):
     words = text.split() 
     spaced_words = []
@@ -97,6 +129,86 @@ def add_spacing(text):
 # ------------------------------
 st.set_page_config(page_title="Text Simplifier — English & Telugu", layout="centered")
 
+# ------------------------------
+# Model Warm-up
+# ------------------------------
+@st.cache_resource
+def warm_up_models():
+    # Runs once per server process; models load on a background thread
+    # The tier selector offers every tier, so none of its summarizers should
+    # load mid-request. Simplification never translates, so NLLB stays lazy.
+    start_model_warmup(tiers=list(MODEL_TIERS), kinds=("stanza", "summarizer"))
+    # Plain-HTTP readiness for load balancers (Streamlit pages need a browser)
+    start_health_server()
+    return True
+
+warm_up_models()
+
+# ------------------------------
+# Background Jobs
+# ------------------------------
+@st.cache_resource
+def get_job_manager():
+    # One pool per server process, shared by every session, so a job outlives
+    # the script run (and the browser tab) that started it
+    return JobManager()
+
+
+def run_simplify_job(job, params):
+    # Runs on a worker thread: report progress on the job, never through st.*
+    return simplify_text_with_nlp_detailed(
+        params["text"],
+        target_language=params["target_language"],
+        target_words=params["target_words"],
+        tier=params["tier"],
+        # Streaming decodes greedily, so it is only used when SUMMARY_STREAMING is on
+        on_partial=(lambda partial: job.update(partial=partial)) if SUMMARY_STREAMING else None,
+        on_stage=lambda stage: job.update(stage=stage),
+        cancel=job.cancel,
+    )
+
+
+def cancel_job(key):
+    # A newer request supersedes the session's job under this key; stop it
+    if st.session_state[key]:
+        get_job_manager().cancel(st.session_state[key])
+        st.session_state[key] = None
+
+
+def submit_tts_job(text, lang):
+    cancel_job("tts_job")
+    # Synthesise at 1.0x; render_audio_player applies audio_rate via playbackRate
+    job_id = get_job_manager().submit(
+        "tts", lambda job: generate_tts_audio(text, lang=lang, cancel=job.cancel).getvalue(), meta={"lang": lang})
+    st.session_state.tts_job = job_id
+
+
+def poll_tts_job(t):
+    """Load a finished TTS job's audio into the player."""
+    job = get_job_manager().get(st.session_state.tts_job) if st.session_state.tts_job else None
+    if job is None:
+        st.session_state.tts_job = None
+        return
+    if job.running:
+        st.caption(f"🔊 {t['audio_generating']}")
+        return
+    st.session_state.tts_job = None
+    if job.state == "cancelled":
+        return
+    if job.state == "failed":
+        st.error(f"Audio playback failed: {job.error}")
+        return
+    st.session_state.audio_processing_time = job.seconds
+    # New audio, so update bytes and version
+    st.session_state.audio_bytes = job.result
+    st.session_state.audio_action = "play"
+    st.session_state.audio_version += 1  # important: tells JS it's a new clip
+
+# Health check: "?health=1" reports model readiness instead of rendering the app
+if st.query_params.get("health"):
+    st.json({**get_model_status(), "jobs": get_job_manager().stats()})
+    st.stop()
+
 # ------------------------------
 # Custom CSS
 # ------------------------------
@@ -170,6 +282,11 @@ h1, h3, p { text-align: center; }
     border: none !important;
 }
 
+/* Noun highlighting from backend spans */
+.noun-hl {
+    border-bottom: 2px solid rgba(34, 197, 94, 0.6);
+}
+
 /* Telugu character assists */
 .df-ta, .df-taa, .df-ti, .df-tu, .df-tva {
     padding: 0 0.06em;
@@ -227,7 +344,8 @@ def render_audio_player():
                 const audio = document.getElementById("ttsAudio");
                 if (!audio) return;
 
-                // Set playback rate & mute every render
+                // Set playback rate & mute every render (pitch is preserved)
+                audio.preservesPitch = true;
                 audio.playbackRate = rate;
                 audio.muted = muted;
 
@@ -312,11 +430,31 @@ for key, default in {
     "bold_first_n": 2,  # Bold first N graphemes
     "char_assist": True,  # Telugu character assists
     "text_processing_time": None,
-    "audio_processing_time": None
+    "audio_processing_time": None,
+    "summary_path": None,  # Which summarizer route served the last request
+    # Requested model tier: auto | fast | quality; starts at the server's MODEL_TIER
+    "model_tier": MODEL_TIER if MODEL_TIER == "auto" or MODEL_TIER in MODEL_TIERS else "quality",
+    "served_tier": None,  # Tier that served the last request
+    "simplified_spans": [],  # Noun (start, end, tag) spans in the simplified text
+    "simplify_job": None,  # Id of the background simplification job
+    "tts_job": None,  # Id of the background TTS job
 }.items():
     if key not in st.session_state:
         st.session_state[key] = default
 
+# Reattach to a simplification job after a page reload: session_state starts
+# over, but the job id survives in the URL
+job_id = st.query_params.get("job")
+if job_id and job_id != st.session_state.simplify_job:
+    job = get_job_manager().get(job_id)
+    if job is None:
+        del st.query_params["job"]
+    else:
+        for key, value in job.meta["session"].items():
+            st.session_state[key] = value
+        st.session_state.simplify_job = job_id
+        st.session_state.page = "processing"
+
 # ------------------------------
 # Translations
 # ------------------------------
@@ -336,11 +474,24 @@ def get_texts(lang):
             "tab_upload": "Upload",
             "simplify": "Simplify",
             "processing": "Simplifying your text...",
+            "models_warming": "⏳ Models are still loading, so your first simplification may take a little longer.",
+            "tier_label": "Speed",
+            "tier_help": "Fast uses smaller models and answers sooner; Quality uses the largest models. Auto picks for you based on text length and load.",
+            "tier_options": {"auto": "Auto", "fast": "Fast", "quality": "Quality"},
+            "stage_labels": {
+                "detect_language": "Detecting language",
+                "pos": "Finding key words",
+                "summarize": "Summarizing",
+                "simplify": "Simplifying",
+                "highlight": "Highlighting key words",
+            },
             "result": "🪄 Simplified Output",
             "reading_assist": "Reading Assist",
             "download": "⬇️ Download Simplified Text",
             "download_audio": "⬇️ Download Audio",
             "back": "⬅️ Back",
+            "job_failed": "Simplification failed: {error}",
+            "audio_generating": "Generating audio...",
             "next": "➡️ Next",
             "theme": "Theme",
             "font_size_label": "Font size",
@@ -408,11 +559,24 @@ def get_texts(lang):
             "tab_upload": "అప్‌లోడ్",
             "simplify": "సరళీకరించు",
             "processing": "మీ పాఠ్యం సరళీకరించబడుతోంది...",
+            "models_warming": "⏳ మోడల్‌లు ఇంకా లోడ్ అవుతున్నాయి, కాబట్టి మొదటి సరళీకరణకు కొంచెం ఎక్కువ సమయం పట్టవచ్చు.",
+            "tier_label": "వేగం",
+            "tier_help": "వేగంగా చిన్న మోడల్‌లను ఉపయోగించి త్వరగా జవాబిస్తుంది; నాణ్యత అతిపెద్ద మోడల్‌లను ఉపయోగిస్తుంది. ఆటో పాఠ్యం పొడవు మరియు లోడ్ ఆధారంగా ఎంచుకుంటుంది.",
+            "tier_options": {"auto": "ఆటో", "fast": "వేగంగా", "quality": "నాణ్యత"},
+            "stage_labels": {
+                "detect_language": "భాషను గుర్తిస్తోంది",
+                "pos": "ముఖ్య పదాలను కనుగొంటోంది",
+                "summarize": "సారాంశం తయారు చేస్తోంది",
+                "simplify": "సరళీకరిస్తోంది",
+                "highlight": "ముఖ్య పదాలను హైలైట్ చేస్తోంది",
+            },
             "result": "🪄 సరళీకృత పాఠ్యం",
             "reading_assist": "పఠన సహాయం",
             "download": "⬇️ సరళీకృత పాఠ్యాన్ని డౌన్‌లోడ్ చేయి",
             "download_audio": "⬇️ ఆడియో డౌన్‌లోడ్ చేయి",
             "back": "⬅️ వెనక్కి",
+            "job_failed": "సరళీకరణ విఫలమైంది: {error}",
+            "audio_generating": "ఆడియో తయారవుతోంది...",
             "next": "➡️ ముందుకు",
             "theme": "థీమ్",
             "font_size_label": "అక్షర పరిమాణం",
@@ -1518,6 +1682,16 @@ def page_input():
         st.markdown(f"**{t['target_words'].format(count=count)}**")
         st.caption(t["approx_length"])
 
+    st.session_state.model_tier = st.radio(
+        t["tier_label"],
+        list(t["tier_options"]),
+        index=list(t["tier_options"]).index(st.session_state.model_tier),
+        format_func=lambda tier: t["tier_options"][tier],
+        horizontal=True,
+        help=t["tier_help"],
+        key="model_tier_radio",
+    )
+
     # # Simplification Options
     # st.divider()
     # st.markdown("**🛠️ Simplification Options**")
@@ -1527,6 +1701,10 @@ def page_input():
     # with col_opts[1]:
     #     st.checkbox("Split long sentences", value=st.session_state.opt_split_long, key="opt_split_long")
 
+    model_status = get_model_status()
+    if not model_status["ready"] and not model_status["failed"]:
+        st.caption(t["models_warming"])
+
     # ------------- Navigation buttons -------------
     # st.divider()
     col1, col2 = st.columns(2)
@@ -1543,31 +1721,84 @@ def page_input():
 def page_processing():
     t = get_texts(st.session_state.lang)
     st.markdown(f"### {t['processing']}")
-    prev = time.time()
-    # Progress stages
-    stages = ["Uploading", "Analyzing", "Simplifying", "Applying preferences", "Finalizing"]
+    # Progress driven by the backend's stage events
     progress_bar = st.progress(0)
     status_text = st.empty()
-    
-    for i, stage in enumerate(stages):
-        status_text.text(f"{stage}...")
-        progress_bar.progress((i + 1) / len(stages))
-        time.sleep(0.5)  # Simulate time
-    
+
+    def show_stage(stage):
+        status_text.text(f"{t['stage_labels'][stage]}...")
+        progress_bar.progress(SIMPLIFY_STAGES.index(stage) / len(SIMPLIFY_STAGES))
+
+    # Show the summary as it is decoded instead of a blank page
+    theme = st.session_state.theme
+    bg_color = "#fff" if theme == "Light" else "#f4ecd8" if theme == "Sepia" else "#1a1a1a"
+    text_color = "#000" if theme != "Dark" else "#fff"
+    partial_box = st.empty()
+    opts = {'assist_on': True, 'bold_first_n': st.session_state.bold_first_n, 'char_assist': True}
+
+    def show_partial(partial):
+        partial_box.markdown(
+            f"<div class='output' style='background:{bg_color}; color:{text_color}; font-size:{st.session_state.font_size}px; line-height:{st.session_state.line_height}; letter-spacing:{st.session_state.letter_spacing}em;'>{render_assistive_text(partial, st.session_state.lang, opts)} ▌</div>",
+            unsafe_allow_html=True,
+        )
+
+    # Simplification runs as a background job; this page polls it on each rerun
+    target_lang = 'tel_Telu' if st.session_state.lang == "తెలుగు" else 'eng_Latn'
+    params = {
+        "text": st.session_state.text_input,
+        "target_language": target_lang,
+        "target_words": st.session_state.get("input_word_count_slider", st.session_state.desired_word_count),
+        "tier": st.session_state.model_tier,
+    }
+    jobs = get_job_manager()
+    job = jobs.get(st.session_state.simplify_job) if st.session_state.simplify_job else None
+    if job is None or job.meta["params"] != params or job.state == "cancelled":
+        # Anything still running for this session is now stale
+        cancel_job("simplify_job")
+        cancel_job("tts_job")
+        # Enough of the session to rebuild this page after a reload
+        restore = {
+            "lang": st.session_state.lang,
+            "user": st.session_state.user,
+            "text_input": st.session_state.text_input,
+            "desired_word_count": params["target_words"],
+            "model_tier": st.session_state.model_tier,
+        }
+        st.session_state.simplify_job = jobs.submit(
+            "simplify", lambda job: run_simplify_job(job, params), meta={"params": params, "session": restore})
+        job = jobs.get(st.session_state.simplify_job)
+    st.query_params["job"] = job.id
+
+    if job.stage:
+        show_stage(job.stage)
+    if job.partial:
+        show_partial(job.partial)
+
+    if job.running:
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+
     progress_bar.empty()
     status_text.empty()
-    
-    # Use advanced NLP-based simplification
-    target_lang = 'tel_Telu' if st.session_state.lang == "తెలుగు" else 'eng_Latn'
-    st.session_state.simplified = simplify_text_with_nlp(
-        st.session_state.text_input,
-        target_language=target_lang,
-        target_words=st.session_state.input_word_count_slider,
-    )
+    if job.state == "failed":
+        partial_box.empty()
+        st.error(t["job_failed"].format(error=job.error))
+        if st.button(t["back"], use_container_width=True):
+            st.session_state.simplify_job = None
+            st.session_state.page = "input"
+            st.rerun()
+        return
+
+    result = job.result
+    st.session_state.simplified = result["text"]
+    st.session_state.simplified_spans = result["spans"]
+    st.session_state.summary_path = result["summary_path"]
+    st.session_state.served_tier = result["tier"]
+    # Audio of the previous text no longer matches; autoplay or Play makes new audio
+    st.session_state.audio_bytes = None
+    st.session_state.audio_action = "stop"
     st.session_state.page = "result"
-    cur = time.time()
-    total_time = cur - prev
-    st.session_state.text_processing_time = total_time
+    st.session_state.text_processing_time = job.seconds
     st.rerun()
 
 
@@ -1616,7 +1847,9 @@ def page_record():
         "input_text": st.session_state.text_input,
         "summary": st.session_state.simplified,
         "text_processing_time": st.session_state.text_processing_time,
-        "audio_processing_time": st.session_state.audio_processing_time
+        "audio_processing_time": st.session_state.audio_processing_time,
+        "summary_path": st.session_state.summary_path,
+        "tier": st.session_state.served_tier,
     }
     
     print(page_record)
@@ -1645,13 +1878,10 @@ def page_result():
     text_color = "#000" if theme != "Dark" else "#fff"
     st.markdown(f"### {t['result']}")
 
-    # Auto-play TTS if enabled
-    if st.session_state.tts_autoplay:
-        try:
-            audio_file = generate_tts_audio(simplified, lang='en' if st.session_state.lang == "English" else 'te', speed=st.session_state.audio_rate)
-            st.audio(audio_file, format="audio/mp3")
-        except Exception as e:
-            st.error(f"Audio playback failed: {e}")
+    # Auto-play TTS if enabled: a background job at 1.0x; the player applies
+    # audio_rate via playbackRate and starts playing when the job finishes
+    if st.session_state.tts_autoplay and st.session_state.audio_bytes is None and st.session_state.tts_job is None:
+        submit_tts_job(simplified, lang='en' if st.session_state.lang == "English" else 'te')
 
     # --- Theme Toggle Buttons ---
     col_theme = st.columns(3)
@@ -1696,7 +1926,7 @@ def page_result():
         'bold_first_n': st.session_state.bold_first_n,
         'char_assist': st.session_state.char_assist
     }
-    display_text = render_assistive_text(display_text, st.session_state.lang, opts)
+    display_text = render_highlighted_text(display_text, st.session_state.simplified_spans, st.session_state.lang, opts)
     
 
     
@@ -1803,29 +2033,14 @@ def page_result():
     #             st.rerun()
     # Audio and Download buttons side by side
 
-
+    # Pick up audio from a finished TTS job before the player and download button render
+    poll_tts_job(t)
 
     col_audio, col_download, col_copy = st.columns(3)
 
     with col_audio:
         if st.button(f"🔊 {t['play_audio']}", use_container_width=True):
-            try:
-                start_time = time.time()
-
-                audio_file = generate_tts_audio(
-                    simplified,
-                    lang='en' if st.session_state.lang == "English" else 'te',
-                    speed=st.session_state.audio_rate,
-                )
-
-                end_time = time.time()
-                st.session_state.audio_processing_time = end_time - start_time
-                # New audio, so update bytes and version
-                st.session_state.audio_bytes = audio_file.getvalue()
-                st.session_state.audio_action = "play"
-                st.session_state.audio_version += 1  # important: tells JS it's a new clip
-            except Exception as e:
-                st.error(f"Audio playback failed: {e}")
+            submit_tts_job(simplified, lang='en' if st.session_state.lang == "English" else 'te')
 
     with col_download:
         # Audio download button (enabled only after audio is generated)
@@ -1866,20 +2081,13 @@ def page_result():
 
         with col_play:
             if st.button(f"▶️ {t['play']}", use_container_width=True):
-                # If audio not generated yet, generate once
+                # If audio not generated yet, generate once; the job starts playback when done
                 if st.session_state.audio_bytes is None:
-                    try:
-                        audio_file = generate_tts_audio(
-                            simplified,
-                            lang='en' if st.session_state.lang == "English" else 'te',
-                            speed=st.session_state.audio_rate,
-                        )
-                        st.session_state.audio_bytes = audio_file.getvalue()
-                        st.session_state.audio_version += 1  # new audio
-                    except Exception as e:
-                        st.error(f"Audio playback failed: {e}")
-                # Just tell JS to play from last stored position
-                st.session_state.audio_action = "play"
+                    if st.session_state.tts_job is None:
+                        submit_tts_job(simplified, lang='en' if st.session_state.lang == "English" else 'te')
+                else:
+                    # Just tell JS to play from last stored position
+                    st.session_state.audio_action = "play"
 
         with col_pause:
             if st.button(f"⏸️ {t['pause']}", use_container_width=True):
@@ -1900,7 +2108,7 @@ def page_result():
         with col_speed_minus:
             if st.button("➖", key="speed_minus", help="Decrease speed"):
                 st.session_state.audio_rate = max(0.25, st.session_state.audio_rate - 0.1)
-                # you can choose to regenerate here manually by hitting main play again
+                # applied by the player through playbackRate; no re-synthesis needed
 
         with col_speed_display:
             st.markdown(
@@ -2015,13 +2223,22 @@ def page_result():
     col1, col2= st.columns(2)
     with col1:
         if st.button(t["back"], use_container_width=True):
+            st.query_params.pop("job", None)
+            cancel_job("tts_job")
             st.session_state.page = "input"
             st.rerun()
     with col2:
         if st.button(t["home"], use_container_width=True):
+            st.query_params.pop("job", None)
+            cancel_job("tts_job")
             st.session_state.page = "page_record"
             st.rerun()
 
+    # Keep rerunning while audio is being generated so it plays as soon as it is ready
+    if st.session_state.tts_job is not None:
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+
 # ------------------------------
 # Router
 # ------------------------------
@@ -0,0 +1,143 @@
+"""Background jobs for the Streamlit app.
+
+Simplification and text-to-speech run on process-wide thread pools (one per
+kind of job, so quick TTS jobs never queue behind slow simplifications)
+instead of inside the script run, so the UI stays responsive and a job survives
+reruns, reconnects and page reloads. The page keeps the job id (in
+st.session_state and the URL) and polls the job until it finishes; finished
+jobs are kept for JOB_RESULT_TTL seconds so a reload picks the result up
+instantly.
+
+Every job carries a cancel event that the backend checks between pipeline
+stages, decoding steps and TTS segments, so work nobody is waiting for any
+more stops early instead of holding a worker.
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Jobs of one kind that run at the same time; the models are shared, so more
+# workers mostly add queueing inside the models rather than throughput.
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+# TTS jobs get a pool of their own of this size.
+TTS_JOB_WORKERS = int(os.environ.get("TTS_JOB_WORKERS", "2"))
+# How long a finished job's result stays available (seconds).
+JOB_RESULT_TTL = float(os.environ.get("JOB_RESULT_TTL", "900"))
+# How often a page waiting on a job reruns to check it (seconds).
+JOB_POLL_SECONDS = float(os.environ.get("JOB_POLL_SECONDS", "0.3"))
+
+
+class Job:
+    """One unit of background work and what is known about it so far.
+
+    The worker updates `stage` and `partial` while it runs; the page reads
+    them on every poll. `cancel` is a threading.Event for fn to pass on to
+    the backend.
+    """
+
+    def __init__(self, kind, meta=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.meta = meta or {}
+        self.state = "queued"  # queued | running | done | failed | cancelled
+        self.stage = None
+        self.partial = None
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel = threading.Event()
+
+    def update(self, stage=None, partial=None):
+        if stage is not None:
+            self.stage = stage
+        if partial is not None:
+            self.partial = partial
+
+    @property
+    def running(self):
+        return self.state in ("queued", "running")
+
+    @property
+    def seconds(self):
+        """Time spent doing the work, excluding time in the queue."""
+        if self.started is None:
+            return None
+        return (self.finished or time.time()) - self.started
+
+
+class JobManager:
+    """Runs jobs on one thread pool per job kind and looks them up by id
+    until they expire.
+
+    workers maps a kind to its pool size; other kinds get max_workers.
+    """
+
+    def __init__(self, max_workers=None, ttl=None, workers=None):
+        self.ttl = JOB_RESULT_TTL if ttl is None else ttl
+        self.max_workers = max_workers or JOB_WORKERS
+        self.workers = {"tts": TTS_JOB_WORKERS} if workers is None else workers
+        self._executors = {}
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, meta=None):
+        """Run fn(job) in the background and return the new job's id.
+        fn's return value becomes job.result; an exception fails the job."""
+        job = Job(kind, meta)
+        with self._lock:
+            self._expire()
+            self._jobs[job.id] = job
+            executor = self._executors.get(kind)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=self.workers.get(kind, self.max_workers),
+                                              thread_name_prefix=f"job-{kind}")
+                self._executors[kind] = executor
+        executor.submit(self._run, job, fn)
+        return job.id
+
+    def _run(self, job, fn):
+        job.started = time.time()
+        if job.cancel.is_set():
+            # Cancelled while still queued
+            job.state = "cancelled"
+            job.finished = job.started
+            return
+        job.state = "running"
+        try:
+            job.result = fn(job)
+            job.state = "done"
+        except Exception as e:
+            if job.cancel.is_set():
+                job.state = "cancelled"
+            else:
+                print(f"Job {job.id} ({job.kind}) failed: {e}")
+                job.error = str(e)
+                job.state = "failed"
+        job.finished = time.time()
+
+    def cancel(self, job_id):
+        """Ask a queued or running job to stop; finished jobs are unaffected."""
+        job = self.get(job_id)
+        if job is not None and job.running:
+            job.cancel.set()
+
+    def get(self, job_id):
+        """The job with this id, or None if it is unknown or has expired."""
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def _expire(self):
+        now = time.time()
+        for job_id in [i for i, job in self._jobs.items()
+                       if job.finished is not None and now - job.finished > self.ttl]:
+            del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            states = [job.state for job in self._jobs.values()]
+        return {state: states.count(state) for state in ("queued", "running", "done", "failed", "cancelled")}